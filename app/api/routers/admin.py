@@ -83,8 +83,7 @@ async def update_user_role(
     Requiere permisos de administrador.
     """
     # Obtener usuario por ID
-    BASE_DIR = Path(__file__).resolve().parent.parent.parent.parent
-    USER_DB_PATH = BASE_DIR / "feedback" / "users.sqlite"
+    from ...db.sqlite import USER_DB_PATH
     
     with sqlite3.connect(str(USER_DB_PATH)) as conn:
         cursor = conn.cursor()
@@ -126,8 +125,7 @@ async def delete_user(
     Elimina un usuario del sistema.
     Requiere permisos de administrador.
     """
-    BASE_DIR = Path(__file__).resolve().parent.parent.parent.parent
-    USER_DB_PATH = BASE_DIR / "feedback" / "users.sqlite"
+    from ...db.sqlite import USER_DB_PATH
     
     with sqlite3.connect(str(USER_DB_PATH)) as conn:
         cursor = conn.cursor()
@@ -3,21 +3,21 @@ Router para embeddings y búsqueda semántica.
 """
 
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import List, Tuple
+from pydantic import BaseModel, Field
+from typing import List, Literal, Tuple, Union
 from ...models.embeddings import get_embedding_store
 
 router = APIRouter(prefix="/embed", tags=["embeddings"])
 
 class EmbedRequest(BaseModel):
-    texts: List[str]
+    texts: List[str] = Field(..., min_length=1)
 
 class EmbedResponse(BaseModel):
     embeddings: List[List[float]]
     dimension: int
 
 class AddDocumentsRequest(BaseModel):
-    documents: List[str]
+    documents: List[str] = Field(..., min_length=1)
 
 class SearchRequest(BaseModel):
     query: str
@@ -30,6 +30,10 @@ class SearchResult(BaseModel):
 class SearchResponse(BaseModel):
     results: List[SearchResult]
 
+class ColumnarSearchResponse(BaseModel):
+    documents: List[str]
+    distances: List[float]
+
 @router.post("/encode", response_model=EmbedResponse)
 async def encode_texts(req: EmbedRequest):
     """Genera embeddings para una lista de textos."""
@@ -56,12 +60,22 @@ async def add_documents(req: AddDocumentsRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error adding documents: {e}")
 
-@router.post("/search", response_model=SearchResponse)
-async def search_documents(req: SearchRequest):
-    """Busca documentos similares usando búsqueda semántica."""
+@router.post("/search", response_model=Union[SearchResponse, ColumnarSearchResponse])
+async def search_documents(req: SearchRequest, format: Literal["rows", "columnar"] = "rows"):
+    """
+    Busca documentos similares usando búsqueda semántica.
+    
+    Con ?format=columnar retorna listas paralelas (documents, distances)
+    en lugar de un objeto por resultado.
+    """
     store = get_embedding_store()
     try:
         results = store.search(req.query, req.top_k)
+        if format == "columnar":
+            return ColumnarSearchResponse(
+                documents=[doc for doc, _ in results],
+                distances=[dist for _, dist in results]
+            )
         return SearchResponse(
             results=[
                 SearchResult(document=doc, distance=dist)
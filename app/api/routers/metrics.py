@@ -6,7 +6,8 @@ router = APIRouter(prefix="/metrics", tags=["metrics"])
 
 
 @router.get("/")
-def get_metrics():
+async def get_metrics():
+    # async: corre en el event loop, el mismo hilo que registra las métricas
     snap = metrics.snapshot()
     model_name = model_manager.current_model_name()
     return {
@@ -18,25 +18,39 @@ class PredictRequest(BaseModel):
 class PredictResponse(BaseModel):
     generated_text: str
 
-async def stream_tokens(text: str):
-    """Genera tokens uno por uno para streaming SSE."""
-    words = text.split()
-    for word in words:
-        yield f"data: {word} \n\n"
-        await asyncio.sleep(0.05)  # Simular delay de generación
+# Tamaño aproximado (bytes) de cada evento SSE: se agrupan palabras en lugar
+# de enviar un evento (y una escritura al socket) por palabra
+STREAM_CHUNK_BYTES = 256
+
+async def stream_tokens(text: str, chunk_bytes: int = STREAM_CHUNK_BYTES):
+    """Genera eventos SSE con grupos de palabras de hasta ~chunk_bytes."""
+    buffer = []
+    size = 0
+    for word in text.split():
+        buffer.append(word)
+        size += len(word) + 1
+        if size >= chunk_bytes:
+            yield f"data: {' '.join(buffer)} \n\n"
+            buffer, size = [], 0
+            await asyncio.sleep(0.05)  # Simular delay de generación
+    if buffer:
+        yield f"data: {' '.join(buffer)} \n\n"
     yield "data: [DONE]\n\n"
 
 @router.post("")
 async def predict(req: PredictRequest, current_user=Depends(get_current_user_optional)):
     cache = get_cache()
+    # El modelo forma parte de la clave: al cambiarlo no se sirven respuestas del anterior
+    cache_params = dict(
+        max_length=req.max_length,
+        num_return_sequences=req.num_return_sequences,
+        temperature=req.temperature,
+        model_name=model_manager.current_model_name(),
+    )
     
-    # Si streaming no está habilitado, usar cache y respuesta normal
-    if not req.stream:
-        # Intentar obtener del cache
-        cached_response = cache.get(req.prompt, req.max_length, req.num_return_sequences, req.temperature)
-        if cached_response is not None:
-            return PredictResponse(generated_text=cached_response)
-        
+    # Intentar obtener del cache (ambos modos): un acierto evita llamar al modelo
+    text = cache.get(req.prompt, **cache_params)
+    if text is None:
         # Generar respuesta
         text = await model_manager.generate(
             req.prompt,
@@ -48,32 +62,22 @@ async def predict(req: PredictRequest, current_user=Depends(get_current_user_opt
             raise HTTPException(status_code=500, detail="Error en inferencia")
         
         # Almacenar en cache
-        cache.set(req.prompt, text, req.max_length, req.num_return_sequences, req.temperature)
-        
+        cache.set(req.prompt, text, **cache_params)
+    
+    # Si streaming no está habilitado, respuesta normal
+    if not req.stream:
         return PredictResponse(generated_text=text)
     
-    # Modo streaming: generar y streamear tokens
-    else:
-        # Generar texto completo primero
-        text = await model_manager.generate(
-            req.prompt,
-            max_length=req.max_length,
-            num_return_sequences=req.num_return_sequences,
-            temperature=req.temperature,
-        )
-        if text.startswith("[ERROR]"):
-            raise HTTPException(status_code=500, detail="Error en inferencia")
-        
-        # Retornar como streaming SSE
-        return StreamingResponse(
-            stream_tokens(text),
-            media_type="text/event-stream",
-            headers={
-                "Cache-Control": "no-cache",
-                "Connection": "keep-alive",
-                "X-Accel-Buffering": "no"  # Desactivar buffering en nginx
-            }
-        )
+    # Modo streaming: retornar el texto como SSE
+    return StreamingResponse(
+        stream_tokens(text),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no"  # Desactivar buffering en nginx
+        }
+    )
 
 @router.get("/cache/stats")
 async def cache_stats():
@@ -5,6 +5,7 @@ Incluye: subida de archivos, listado, eliminación, inicio de entrenamiento y mo
 
 from fastapi import APIRouter, HTTPException, UploadFile, File, BackgroundTasks
 from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 from typing import List, Dict, Optional
 from pathlib import Path
 from pydantic import BaseModel
@@ -14,7 +15,7 @@ from ...db.training_metrics import (
     get_epoch_metrics,
     get_latest_run_metrics
 )
-from ...training.data_loader import TrainingDataLoader
+from ...training.data_loader import TrainingDataLoader, deduplicate_lines
 from ...training.trainer import LLMTrainer
 from ...training.job_manager import job_manager
 import logging
@@ -28,6 +29,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent.parent.parent
 data_loader = TrainingDataLoader(BASE_DIR)
 MODEL_DIR = BASE_DIR / "model_llm"
 MODEL_DIR.mkdir(parents=True, exist_ok=True)
+TOKEN_CACHE_DIR = BASE_DIR / "trainer_llm" / "cache"
 
 
 # ===== MODELOS PYDANTIC =====
@@ -153,7 +155,8 @@ def run_training_job(job_id: str, model_name: str, training_data: List[str], con
             model_name=model_name,
             training_data=training_data,
             output_dir=MODEL_DIR,
-            config=config
+            config=config,
+            cache_dir=TOKEN_CACHE_DIR
         )
         
         # Callback de progreso
@@ -184,9 +187,10 @@ async def start_training(
         config: Configuración del entrenamiento
     """
     try:
-        # Recopilar datos según source
+        # Recopilar datos según source. El parseo es bloqueante (PDF, Excel...):
+        # se ejecuta en el threadpool para no detener el event loop
         if config.source == "all":
-            training_data, stats = data_loader.collect_all_data()
+            training_data, stats = await run_in_threadpool(data_loader.collect_all_data)
             if not training_data:
                 raise HTTPException(
                     status_code=400,
@@ -195,7 +199,8 @@ async def start_training(
         
         elif config.source in ["dialogue", "knowledge"]:
             directory = data_loader.dialogue_dir if config.source == "dialogue" else data_loader.knowledge_dir
-            training_data, _, _ = data_loader.collect_from_directory(directory)
+            training_data, _, _ = await run_in_threadpool(data_loader.collect_from_directory, directory)
+            training_data = deduplicate_lines(training_data)
             if not training_data:
                 raise HTTPException(
                     status_code=400,
@@ -204,7 +209,9 @@ async def start_training(
         
         elif config.folder and config.source:
             # Entrenar con un archivo específico
-            training_data = data_loader.collect_from_file(config.folder, config.source)
+            training_data = deduplicate_lines(
+                await run_in_threadpool(data_loader.collect_from_file, config.folder, config.source)
+            )
             if not training_data:
                 raise HTTPException(
                     status_code=400,
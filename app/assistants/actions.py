@@ -14,26 +14,26 @@ class IntentParser:
     
     # Patrones de intención para crear productos
     CREATE_PRODUCT_PATTERNS = [
-        r"(crear|agregar|añadir|nuevo|añade)\s+(un\s+)?producto",
-        r"quiero\s+(crear|agregar|añadir)\s+(.+?)\s+(a|al)\s+(catálogo|inventario|productos)",
-        r"(agreg(a|ar)|añad(e|ir)|crea(r)?)\s+(.+?)\s+(por|a)\s+\$?(\d+)",
+        re.compile(r"(crear|agregar|añadir|nuevo|añade)\s+(un\s+)?producto"),
+        re.compile(r"quiero\s+(crear|agregar|añadir)\s+(.+?)\s+(a|al)\s+(catálogo|inventario|productos)"),
+        re.compile(r"(agreg(a|ar)|añad(e|ir)|crea(r)?)\s+(.+?)\s+(por|a)\s+\$?(\d+)"),
     ]
     
     # Patrones de intención para crear tareas
     CREATE_TASK_PATTERNS = [
-        r"(crear?|agregar?|añadir?|nueva?)\s+(una\s+)?tarea",
-        r"tengo\s+que\s+(.+)",
-        r"debo\s+(.+)",
-        r"recuérda(me)?\s+(.+)",
-        r"anot(a|ar)\s+(que|una\s+tarea)?\s*:?\s*(.+)",
+        re.compile(r"(crear?|agregar?|añadir?|nueva?)\s+(una\s+)?tarea"),
+        re.compile(r"tengo\s+que\s+(.+)"),
+        re.compile(r"debo\s+(.+)"),
+        re.compile(r"recuérda(me)?\s+(.+)"),
+        re.compile(r"anot(a|ar)\s+(que|una\s+tarea)?\s*:?\s*(.+)"),
     ]
     
     # Patrones de intención para crear citas
     CREATE_APPOINTMENT_PATTERNS = [
-        r"(crear|agregar|añadir|nueva|agendar)\s+(una\s+)?(cita|reunión|meeting|junta)",
-        r"tengo\s+(una\s+)?(cita|reunión|junta)\s+(.+)",
-        r"reunión\s+con\s+(.+)",
-        r"(programa|agendar|anotar)\s+(una\s+)?(cita|reunión|junta)",
+        re.compile(r"(crear|agregar|añadir|nueva|agendar)\s+(una\s+)?(cita|reunión|meeting|junta)"),
+        re.compile(r"tengo\s+(una\s+)?(cita|reunión|junta)\s+(.+)"),
+        re.compile(r"reunión\s+con\s+(.+)"),
+        re.compile(r"(programa|agendar|anotar)\s+(una\s+)?(cita|reunión|junta)"),
     ]
     
     # Patrones de fecha/hora
@@ -50,7 +50,24 @@ class IntentParser:
         'el domingo': None,
     }
     
-    TIME_PATTERN = r'(\d{1,2}):?(\d{2})?\s*(am|pm|a\.m\.|p\.m\.)?'
+    TIME_PATTERN = re.compile(r'(\d{1,2}):?(\d{2})?\s*(am|pm|a\.m\.|p\.m\.)?')
+    
+    # Patrones de extracción de parámetros (compilados una sola vez al importar)
+    PRODUCT_PRICE_PATTERN = re.compile(r'(agreg(a|ar)|añad(e|ir)|crea(r)?)\s+(.+?)\s+por\s+\$?(\d+)')
+    PRODUCT_FORM_PATTERN = re.compile(r'producto:?\s*(.+?)\s*-\s*\$?(\d+\.?\d*)\s*-?\s*(\d+)?')
+    PRODUCT_GENERIC_PATTERN = re.compile(r'(crear|agregar|añadir)\s+(un\s+)?producto')
+    TASK_HAVE_TO_PATTERN = re.compile(r'tengo\s+que\s+(.+)')
+    TASK_MUST_PATTERN = re.compile(r'debo\s+(.+)')
+    TASK_REMIND_PATTERN = re.compile(r'recuérda(me)?\s+(.+)')
+    TASK_CREATE_PATTERN = re.compile(r'(crear?|agregar?|añadir?)\s+(?:una\s+)?tarea\s+(?:para\s+)?(.+)')
+    APPOINTMENT_MEETING_PATTERN = re.compile(r'reunión\s+con\s+(.+?)(?:\s+el|\s+a\s+las|\s+mañana|\s+hoy|$)')
+    APPOINTMENT_WITH_PATTERN = re.compile(r'(cita|junta)\s+con\s+(.+?)(?:\s+el|\s+a\s+las|\s+mañana|\s+hoy|$)')
+    APPOINTMENT_CREATE_PATTERN = re.compile(r'(crear|agendar|agregar)\s+(cita|reunión|junta):?\s*(.+?)(?:\s+el|\s+a\s+las|\s+mañana|\s+hoy|$)')
+    APPOINTMENT_HAVE_PATTERN = re.compile(r'tengo\s+(junta|reunión)\s+de\s+(.+?)(?:\s+el|\s+a\s+las|\s+mañana|\s+hoy|$)')
+    CLEAN_DATE_PATTERN = re.compile(r'\s+(hoy|mañana|pasado mañana|el\s+(lunes|martes|miércoles|jueves|viernes|sábado|domingo))')
+    CLEAN_TIME_PATTERN = re.compile(r'\s+a\s+las\s+\d{1,2}:\d{2}')
+    CLEAN_PRIORITY_PATTERN = re.compile(r'\s+(urgente|importante|prioritario)')
+    EXPLICIT_DATE_PATTERN = re.compile(r'(\d{1,2})[/-](\d{1,2})[/-](\d{4})')
     
     # Patrones de prioridad
     PRIORITY_PATTERNS = {
@@ -78,21 +95,21 @@ class IntentParser:
         
         # Detectar intención de crear producto
         for pattern in IntentParser.CREATE_PRODUCT_PATTERNS:
-            if re.search(pattern, message_lower):
+            if pattern.search(message_lower):
                 params = IntentParser._extract_product_params(message)
                 if params:
                     return 'create_product', params
         
         # Detectar intención de crear tarea
         for pattern in IntentParser.CREATE_TASK_PATTERNS:
-            if re.search(pattern, message_lower):
+            if pattern.search(message_lower):
                 params = IntentParser._extract_task_params(message)
                 if params:
                     return 'create_task', params
         
         # Detectar intención de crear cita
         for pattern in IntentParser.CREATE_APPOINTMENT_PATTERNS:
-            if re.search(pattern, message_lower):
+            if pattern.search(message_lower):
                 params = IntentParser._extract_appointment_params(message)
                 if params:
                     return 'create_appointment', params
@@ -108,7 +125,7 @@ class IntentParser:
         
         # Intentar extraer nombre y precio
         # Patrón: "agregar/agrega laptop por $1500"
-        match = re.search(r'(agreg(a|ar)|añad(e|ir)|crea(r)?)\s+(.+?)\s+por\s+\$?(\d+)', message_lower)
+        match = IntentParser.PRODUCT_PRICE_PATTERN.search(message_lower)
         if match:
             product_name = match.group(5).strip().title()
             price = float(match.group(6))
@@ -119,7 +136,7 @@ class IntentParser:
             }
         
         # Patrón: "crear producto: nombre - precio - stock"
-        match = re.search(r'producto:?\s*(.+?)\s*-\s*\$?(\d+\.?\d*)\s*-?\s*(\d+)?', message_lower)
+        match = IntentParser.PRODUCT_FORM_PATTERN.search(message_lower)
         if match:
             return {
                 'name': match.group(1).strip().title(),
@@ -128,7 +145,7 @@ class IntentParser:
             }
         
         # Extracción genérica: pedir nombre si solo dice "crear producto"
-        if re.search(r'(crear|agregar|añadir)\s+(un\s+)?producto', message_lower):
+        if IntentParser.PRODUCT_GENERIC_PATTERN.search(message_lower):
             return {
                 'needs_clarification': True,
                 'missing': ['name', 'price']
@@ -145,25 +162,25 @@ class IntentParser:
         title = None
         
         # Patrón: "tengo que [hacer algo]"
-        match = re.search(r'tengo\s+que\s+(.+)', message_lower)
+        match = IntentParser.TASK_HAVE_TO_PATTERN.search(message_lower)
         if match:
             title = match.group(1).strip()
         
         # Patrón: "debo [hacer algo]"
         if not title:
-            match = re.search(r'debo\s+(.+)', message_lower)
+            match = IntentParser.TASK_MUST_PATTERN.search(message_lower)
             if match:
                 title = match.group(1).strip()
         
         # Patrón: "recuérdame [hacer algo]"
         if not title:
-            match = re.search(r'recuérda(me)?\s+(.+)', message_lower)
+            match = IntentParser.TASK_REMIND_PATTERN.search(message_lower)
             if match:
                 title = match.group(2).strip()
         
         # Patrón: "crear/crea tarea: [título]" o "crear/crea tarea para [título]"
         if not title:
-            match = re.search(r'(crear?|agregar?|añadir?)\s+(?:una\s+)?tarea\s+(?:para\s+)?(.+)', message_lower)
+            match = IntentParser.TASK_CREATE_PATTERN.search(message_lower)
             if match:
                 title = match.group(2).strip()
         
@@ -198,25 +215,25 @@ class IntentParser:
         title = None
         
         # Patrón: "reunión con [persona]"
-        match = re.search(r'reunión\s+con\s+(.+?)(?:\s+el|\s+a\s+las|\s+mañana|\s+hoy|$)', message_lower)
+        match = IntentParser.APPOINTMENT_MEETING_PATTERN.search(message_lower)
         if match:
             title = f"Reunión con {match.group(1).strip()}"
         
         # Patrón: "cita/junta con [persona/descripción]"
         if not title:
-            match = re.search(r'(cita|junta)\s+con\s+(.+?)(?:\s+el|\s+a\s+las|\s+mañana|\s+hoy|$)', message_lower)
+            match = IntentParser.APPOINTMENT_WITH_PATTERN.search(message_lower)
             if match:
                 title = f"{match.group(1).capitalize()} con {match.group(2).strip()}"
         
         # Patrón: "agendar cita [descripción]"
         if not title:
-            match = re.search(r'(crear|agendar|agregar)\s+(cita|reunión|junta):?\s*(.+?)(?:\s+el|\s+a\s+las|\s+mañana|\s+hoy|$)', message_lower)
+            match = IntentParser.APPOINTMENT_CREATE_PATTERN.search(message_lower)
             if match:
                 title = match.group(3).strip()
         
         # Patrón: "tengo junta de [descripción]"
         if not title:
-            match = re.search(r'tengo\s+(junta|reunión)\s+de\s+(.+?)(?:\s+el|\s+a\s+las|\s+mañana|\s+hoy|$)', message_lower)
+            match = IntentParser.APPOINTMENT_HAVE_PATTERN.search(message_lower)
             if match:
                 title = f"{match.group(1).capitalize()} de {match.group(2).strip()}"
         
@@ -249,11 +266,11 @@ class IntentParser:
     def _clean_task_title(title: str) -> str:
         """Limpia el título de la tarea eliminando partes innecesarias."""
         # Eliminar referencias de fecha
-        title = re.sub(r'\s+(hoy|mañana|pasado mañana|el\s+(lunes|martes|miércoles|jueves|viernes|sábado|domingo))', '', title)
+        title = IntentParser.CLEAN_DATE_PATTERN.sub('', title)
         # Eliminar referencias de hora
-        title = re.sub(r'\s+a\s+las\s+\d{1,2}:\d{2}', '', title)
+        title = IntentParser.CLEAN_TIME_PATTERN.sub('', title)
         # Eliminar referencias de prioridad
-        title = re.sub(r'\s+(urgente|importante|prioritario)', '', title)
+        title = IntentParser.CLEAN_PRIORITY_PATTERN.sub('', title)
         return title.strip()
     
     @staticmethod
@@ -273,7 +290,7 @@ class IntentParser:
                     return IntentParser._get_next_weekday(day_name)
         
         # Buscar fecha explícita: DD/MM/YYYY o DD-MM-YYYY
-        match = re.search(r'(\d{1,2})[/-](\d{1,2})[/-](\d{4})', message)
+        match = IntentParser.EXPLICIT_DATE_PATTERN.search(message)
         if match:
             day, month, year = match.groups()
             return f"{year}-{month.zfill(2)}-{day.zfill(2)}"
@@ -283,7 +300,7 @@ class IntentParser:
     @staticmethod
     def _extract_time(message: str) -> Optional[str]:
         """Extrae la hora del mensaje en formato HH:MM."""
-        match = re.search(IntentParser.TIME_PATTERN, message.lower())
+        match = IntentParser.TIME_PATTERN.search(message.lower())
         if match:
             hour = int(match.group(1))
             minute = int(match.group(2)) if match.group(2) else 0
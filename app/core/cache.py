@@ -5,7 +5,8 @@ Cachea por hash(prompt + parámetros) con TTL configurable.
 
 import hashlib
 import time
-from typing import Optional, Dict, Tuple
+from collections import OrderedDict
+from typing import Callable, Optional, Dict, Tuple
 from threading import Lock
 import logging
 
@@ -14,75 +15,95 @@ logger = logging.getLogger(__name__)
 class LLMCache:
     """Cache LRU simple con TTL para respuestas de modelos."""
     
-    def __init__(self, max_size: int = 100, ttl_seconds: int = 3600):
+    def __init__(self, max_size: int = 100, ttl_seconds: int = 3600, time_fn: Callable[[], float] = time.monotonic):
         """
         Args:
             max_size: Número máximo de entradas en cache
             ttl_seconds: Tiempo de vida de cada entrada en segundos (default 1 hora)
+            time_fn: Reloj usado para el TTL (monotónico por defecto, inyectable en tests)
         """
         self.max_size = max_size
         self.ttl_seconds = ttl_seconds
-        self._cache: Dict[str, Tuple[str, float]] = {}  # key -> (value, timestamp)
-        self._access_order: list = []  # Para implementar LRU
+        self._time_fn = time_fn
+        # key -> (value, timestamp), ordenado del menos al más recientemente usado
+        self._cache: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
         self._lock = Lock()
     
-    def _make_key(self, prompt: str, max_length: int, num_return_sequences: int, temperature: float) -> str:
-        """Genera una clave única basada en el prompt y parámetros."""
-        data = f"{prompt}|{max_length}|{num_return_sequences}|{temperature}"
-        return hashlib.sha256(data.encode()).hexdigest()
+    def _make_key(
+        self,
+        prompt: str,
+        max_length: int,
+        num_return_sequences: int,
+        temperature: float,
+        model_name: Optional[str] = None
+    ) -> str:
+        """Genera una clave única basada en el modelo, el prompt y los parámetros."""
+        data = f"{model_name}|{prompt}|{max_length}|{num_return_sequences}|{temperature}"
+        return hashlib.blake2b(data.encode(), digest_size=16).hexdigest()
     
-    def get(self, prompt: str, max_length: int = 50, num_return_sequences: int = 1, temperature: float = 0.7) -> Optional[str]:
+    def get(
+        self,
+        prompt: str,
+        max_length: int = 50,
+        num_return_sequences: int = 1,
+        temperature: float = 0.7,
+        model_name: Optional[str] = None
+    ) -> Optional[str]:
         """
         Obtiene respuesta del cache si existe y no ha expirado.
         
         Returns:
             Respuesta cacheada o None si no existe o expiró
         """
-        key = self._make_key(prompt, max_length, num_return_sequences, temperature)
+        key = self._make_key(prompt, max_length, num_return_sequences, temperature, model_name)
         with self._lock:
-            if key not in self._cache:
+            entry = self._cache.get(key)
+            if entry is None:
                 logger.debug(f"[Cache] MISS: {key[:16]}...")
                 return None
             
-            value, timestamp = self._cache[key]
+            value, timestamp = entry
             # Verificar TTL
-            if time.time() - timestamp > self.ttl_seconds:
+            if self._time_fn() - timestamp > self.ttl_seconds:
                 logger.debug(f"[Cache] EXPIRED: {key[:16]}...")
                 del self._cache[key]
-                self._access_order.remove(key)
                 return None
             
             # Actualizar orden de acceso (LRU)
-            self._access_order.remove(key)
-            self._access_order.append(key)
+            self._cache.move_to_end(key)
             logger.debug(f"[Cache] HIT: {key[:16]}...")
             return value
     
-    def set(self, prompt: str, response: str, max_length: int = 50, num_return_sequences: int = 1, temperature: float = 0.7):
+    def set(
+        self,
+        prompt: str,
+        response: str,
+        max_length: int = 50,
+        num_return_sequences: int = 1,
+        temperature: float = 0.7,
+        model_name: Optional[str] = None
+    ):
         """
         Almacena respuesta en cache.
         Si se alcanza max_size, elimina el elemento menos recientemente usado.
         """
-        key = self._make_key(prompt, max_length, num_return_sequences, temperature)
+        key = self._make_key(prompt, max_length, num_return_sequences, temperature, model_name)
         with self._lock:
             # Si ya existe, actualizar timestamp
             if key in self._cache:
-                self._access_order.remove(key)
+                self._cache.move_to_end(key)
             # Si cache lleno, eliminar LRU
             elif len(self._cache) >= self.max_size:
-                lru_key = self._access_order.pop(0)
-                del self._cache[lru_key]
+                lru_key, _ = self._cache.popitem(last=False)
                 logger.debug(f"[Cache] EVICT LRU: {lru_key[:16]}...")
             
-            self._cache[key] = (response, time.time())
-            self._access_order.append(key)
+            self._cache[key] = (response, self._time_fn())
             logger.debug(f"[Cache] SET: {key[:16]}... (total: {len(self._cache)})")
     
     def clear(self):
         """Limpia todo el cache."""
         with self._lock:
             self._cache.clear()
-            self._access_order.clear()
             logger.info("[Cache] Cleared")
     
     def stats(self) -> Dict[str, int]:
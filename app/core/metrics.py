@@ -1,51 +1,89 @@
+"""
+Métricas de peticiones HTTP (conteos, latencia media y códigos de estado).
+Los record_* suman en un único conjunto de pendientes sin lock; no hay buffers
+por hilo ni volcado periódico: snapshot() (GET /metrics) vuelca al leer.
+"""
 import time
+from collections import Counter
 from typing import Dict
 from threading import Lock
 
+# Totales compartidos: solo se escriben al volcar los pendientes (flush)
 _lock = Lock()
-_total_requests = 0
-_path_counts: Dict[str, int] = {}
+_path_counts: Counter = Counter()
 _latency_acc_ms: Dict[str, float] = {}
 _latency_samples: Dict[str, int] = {}
-_status_counts: Dict[int, int] = {}
-_path_status_counts: Dict[str, Dict[int, int]] = {}
+# Única tabla de códigos de estado: status_counts y path_status_counts se
+# derivan de ella en snapshot()
+_path_status_counts: Counter = Counter()  # (path, status) -> n
+
+
+class _Pending:
+    """Incrementos aún no volcados a los totales compartidos."""
+    
+    __slots__ = ("paths", "latency_ms", "latency_n", "path_statuses")
+    
+    def __init__(self):
+        self.paths = Counter()
+        self.latency_ms = Counter()
+        self.latency_n = Counter()
+        self.path_statuses = Counter()  # (path, status) -> n
+
+
+# Los record_* se llaman desde el middleware HTTP (async, en el hilo del event
+# loop) y /metrics también es async: incrementos y volcado ocurren en el mismo
+# hilo, así que los incrementos no toman lock y flush() solo cambia la referencia
+_pending = _Pending()
 
 
 def record_request(path: str):
-    global _total_requests
-    with _lock:
-        _total_requests += 1
-        _path_counts[path] = _path_counts.get(path, 0) + 1
+    _pending.paths[path] += 1
 
 
 def record_latency(path: str, ms: float):
-    with _lock:
-        _latency_acc_ms[path] = _latency_acc_ms.get(path, 0.0) + ms
-        _latency_samples[path] = _latency_samples.get(path, 0) + 1
+    pending = _pending
+    pending.latency_ms[path] += ms
+    pending.latency_n[path] += 1
 
 
 def record_status(path: str, status_code: int):
+    _pending.path_statuses[(path, status_code)] += 1
+
+
+def flush():
+    """Intercambia los contadores pendientes por unos vacíos y los suma a los totales."""
+    global _pending
+    pending, _pending = _pending, _Pending()
     with _lock:
-        _status_counts[status_code] = _status_counts.get(status_code, 0) + 1
-        d = _path_status_counts.get(path)
-        if d is None:
-            d = {}
-            _path_status_counts[path] = d
-        d[status_code] = d.get(status_code, 0) + 1
+        _path_counts.update(pending.paths)
+        for p, ms in pending.latency_ms.items():
+            _latency_acc_ms[p] = _latency_acc_ms.get(p, 0.0) + ms
+        for p, n in pending.latency_n.items():
+            _latency_samples[p] = _latency_samples.get(p, 0) + n
+        _path_status_counts.update(pending.path_statuses)
 
 
 def snapshot():
+    flush()
     with _lock:
         avg_latencies = {}
         for p, total in _latency_acc_ms.items():
             n = _latency_samples.get(p, 1)
             avg_latencies[p] = total / n if n else 0.0
+        # path_counts se registra al entrar la petición (incluye las que
+        # siguen en curso); los códigos de estado se agregan desde la tabla
+        # (path, status)
+        status_counts: Dict[int, int] = {}
+        path_status_counts: Dict[str, Dict[int, int]] = {}
+        for (p, code), n in _path_status_counts.items():
+            status_counts[code] = status_counts.get(code, 0) + n
+            path_status_counts.setdefault(p, {})[code] = n
         return {
-            "total_requests": _total_requests,
+            "total_requests": sum(_path_counts.values()),
             "path_counts": dict(_path_counts),
             "avg_latency_ms": avg_latencies,
-            "status_counts": dict(_status_counts),
-            "path_status_counts": {p: dict(sc) for p, sc in _path_status_counts.items()},
+            "status_counts": status_counts,
+            "path_status_counts": path_status_counts,
         }
 
 
@@ -1,23 +1,38 @@
 import time
-from collections import defaultdict
 from threading import Lock
+from typing import Callable, Dict, Optional, Tuple
 
 class RateLimiter:
-    def __init__(self, requests: int, window_seconds: int):
+    """
+    Token bucket por identificador.
+
+    Cada identificador tiene hasta `requests` tokens (ráfaga máxima) que se
+    recargan de forma continua a `requests / window_seconds` tokens por segundo,
+    salvo que se indique otro `refill_rate`. Cada petición consume un token.
+    `time_fn` es el reloj de la recarga (monotónico por defecto, inyectable en tests).
+    """
+    def __init__(
+        self,
+        requests: int,
+        window_seconds: int,
+        refill_rate: Optional[float] = None,
+        time_fn: Callable[[], float] = time.monotonic,
+    ):
         self.requests = requests
         self.window = window_seconds
+        self.capacity = float(requests)
+        self.refill_rate = refill_rate if refill_rate is not None else requests / window_seconds
+        self._time_fn = time_fn
         self._lock = Lock()
-        self._buckets = defaultdict(list)  # identifier -> list[timestamps]
+        self._buckets: Dict[str, Tuple[float, float]] = {}  # identifier -> (tokens, last_ts)
 
     def allow(self, identifier: str) -> bool:
-        now = time.time()
+        now = self._time_fn()
         with self._lock:
-            timestamps = self._buckets[identifier]
-            # Remove expired timestamps
-            cutoff = now - self.window
-            while timestamps and timestamps[0] < cutoff:
-                timestamps.pop(0)
-            if len(timestamps) < self.requests:
-                timestamps.append(now)
-                return True
-            return False
+            tokens, last = self._buckets.get(identifier, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - last) * self.refill_rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[identifier] = (tokens, now)
+            return allowed
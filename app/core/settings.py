@@ -19,6 +19,7 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "CHANGE_ME"
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_MINUTES: int = 30
+    AUTH_BCRYPT_ROUNDS: int = 12  # Coste de bcrypt (2^rounds); 4 es el mínimo, solo para tests
     
     # Modelo
     DEFAULT_MODEL: str = "gpt2"
@@ -4,12 +4,13 @@ config_db.py
 Gestión de configuración personalizable del sistema almacenada en SQLite.
 """
 
+import os
 from pathlib import Path
-import sqlite3
 from typing import Optional, Dict
+from .pool import connect
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
-FEEDBACK_DIR = BASE_DIR / "feedback"
+FEEDBACK_DIR = Path(os.getenv("APP_DATA_DIR", BASE_DIR / "feedback"))
 CONFIG_DB_PATH = FEEDBACK_DIR / "config.sqlite"
 
 FEEDBACK_DIR.mkdir(exist_ok=True)
@@ -17,7 +18,7 @@ FEEDBACK_DIR.mkdir(exist_ok=True)
 
 def init_config_db():
     """Inicializa la tabla de configuración con valores por defecto."""
-    with sqlite3.connect(str(CONFIG_DB_PATH)) as conn:
+    with connect(CONFIG_DB_PATH) as conn:
         cursor = conn.cursor()
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS app_config (
@@ -46,7 +47,7 @@ def init_config_db():
 
 def get_config(key: str) -> Optional[str]:
     """Obtiene un valor de configuración."""
-    with sqlite3.connect(str(CONFIG_DB_PATH)) as conn:
+    with connect(CONFIG_DB_PATH) as conn:
         cursor = conn.cursor()
         cursor.execute("SELECT value FROM app_config WHERE key = ?", (key,))
         row = cursor.fetchone()
@@ -55,7 +56,7 @@ def get_config(key: str) -> Optional[str]:
 
 def set_config(key: str, value: str):
     """Actualiza o inserta un valor de configuración."""
-    with sqlite3.connect(str(CONFIG_DB_PATH)) as conn:
+    with connect(CONFIG_DB_PATH) as conn:
         cursor = conn.cursor()
         cursor.execute(
             "INSERT OR REPLACE INTO app_config (key, value) VALUES (?, ?)",
@@ -66,7 +67,7 @@ def set_config(key: str, value: str):
 
 def get_all_config() -> Dict[str, str]:
     """Obtiene toda la configuración como diccionario."""
-    with sqlite3.connect(str(CONFIG_DB_PATH)) as conn:
+    with connect(CONFIG_DB_PATH) as conn:
         cursor = conn.cursor()
         cursor.execute("SELECT key, value FROM app_config")
         return {row[0]: row[1] for row in cursor.fetchall()}
@@ -74,7 +75,7 @@ def get_all_config() -> Dict[str, str]:
 
 def delete_config(key: str):
     """Elimina una clave de configuración."""
-    with sqlite3.connect(str(CONFIG_DB_PATH)) as conn:
+    with connect(CONFIG_DB_PATH) as conn:
         cursor = conn.cursor()
         cursor.execute("DELETE FROM app_config WHERE key = ?", (key,))
         conn.commit()
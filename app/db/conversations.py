@@ -1,13 +1,14 @@
 """
 Gestión de historial de conversaciones por usuario.
 """
+import os
 from pathlib import Path
-import sqlite3
 from typing import List, Dict, Optional
 from datetime import datetime
+from .pool import connect
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
-FEEDBACK_DIR = BASE_DIR / "feedback"
+FEEDBACK_DIR = Path(os.getenv("APP_DATA_DIR", BASE_DIR / "feedback"))
 CONVERSATIONS_DB_PATH = FEEDBACK_DIR / "conversations.sqlite"
 
 FEEDBACK_DIR.mkdir(exist_ok=True)
@@ -15,7 +16,7 @@ FEEDBACK_DIR.mkdir(exist_ok=True)
 
 def init_conversations_db():
     """Inicializa la base de datos de conversaciones."""
-    with sqlite3.connect(str(CONVERSATIONS_DB_PATH)) as conn:
+    with connect(CONVERSATIONS_DB_PATH) as conn:
         cursor = conn.cursor()
         
         # Tabla de conversaciones
@@ -82,7 +83,7 @@ def init_conversations_db():
 
 def create_conversation(user_id: int, assistant_type: str) -> int:
     """Crea una nueva conversación."""
-    with sqlite3.connect(str(CONVERSATIONS_DB_PATH)) as conn:
+    with connect(CONVERSATIONS_DB_PATH) as conn:
         cursor = conn.cursor()
         cursor.execute("""
             INSERT INTO conversations (user_id, assistant_type)
@@ -94,7 +95,7 @@ def create_conversation(user_id: int, assistant_type: str) -> int:
 
 def get_conversation(conversation_id: int, user_id: int) -> Optional[Dict]:
     """Obtiene una conversación verificando que pertenezca al usuario."""
-    with sqlite3.connect(str(CONVERSATIONS_DB_PATH)) as conn:
+    with connect(CONVERSATIONS_DB_PATH) as conn:
         cursor = conn.cursor()
         cursor.execute("""
             SELECT id, user_id, assistant_type, created_at, updated_at
@@ -115,7 +116,7 @@ def get_conversation(conversation_id: int, user_id: int) -> Optional[Dict]:
 
 def list_conversations(user_id: int, assistant_type: str = None, limit: int = 50) -> List[Dict]:
     """Lista las conversaciones de un usuario."""
-    with sqlite3.connect(str(CONVERSATIONS_DB_PATH)) as conn:
+    with connect(CONVERSATIONS_DB_PATH) as conn:
         cursor = conn.cursor()
         
         query = """
@@ -147,7 +148,7 @@ def list_conversations(user_id: int, assistant_type: str = None, limit: int = 50
 
 def delete_conversation(conversation_id: int, user_id: int) -> bool:
     """Elimina una conversación y sus mensajes."""
-    with sqlite3.connect(str(CONVERSATIONS_DB_PATH)) as conn:
+    with connect(CONVERSATIONS_DB_PATH) as conn:
         cursor = conn.cursor()
         
         # Verificar que pertenece al usuario
@@ -170,7 +171,7 @@ def delete_conversation(conversation_id: int, user_id: int) -> bool:
 
 def add_message(conversation_id: int, role: str, content: str) -> int:
     """Agrega un mensaje a una conversación."""
-    with sqlite3.connect(str(CONVERSATIONS_DB_PATH)) as conn:
+    with connect(CONVERSATIONS_DB_PATH) as conn:
         cursor = conn.cursor()
         
         # Agregar mensaje
@@ -192,7 +193,7 @@ def add_message(conversation_id: int, role: str, content: str) -> int:
 
 def get_conversation_messages(conversation_id: int, limit: int = 100) -> List[Dict]:
     """Obtiene los mensajes de una conversación."""
-    with sqlite3.connect(str(CONVERSATIONS_DB_PATH)) as conn:
+    with connect(CONVERSATIONS_DB_PATH) as conn:
         cursor = conn.cursor()
         cursor.execute("""
             SELECT id, conversation_id, role, content, created_at
@@ -218,7 +219,7 @@ def get_conversation_messages(conversation_id: int, limit: int = 100) -> List[Di
 
 def track_event(user_id: int, event_type: str, event_data: str = None):
     """Registra un evento de analytics."""
-    with sqlite3.connect(str(CONVERSATIONS_DB_PATH)) as conn:
+    with connect(CONVERSATIONS_DB_PATH) as conn:
         cursor = conn.cursor()
         cursor.execute("""
             INSERT INTO user_analytics (user_id, event_type, event_data)
@@ -229,7 +230,7 @@ def track_event(user_id: int, event_type: str, event_data: str = None):
 
 def get_user_stats(user_id: int) -> Dict:
     """Obtiene estadísticas del usuario."""
-    with sqlite3.connect(str(CONVERSATIONS_DB_PATH)) as conn:
+    with connect(CONVERSATIONS_DB_PATH) as conn:
         cursor = conn.cursor()
         
         # Total de conversaciones
@@ -276,7 +277,7 @@ def get_user_stats(user_id: int) -> Dict:
 
 def get_recent_activity(user_id: int, days: int = 7) -> List[Dict]:
     """Obtiene la actividad reciente del usuario."""
-    with sqlite3.connect(str(CONVERSATIONS_DB_PATH)) as conn:
+    with connect(CONVERSATIONS_DB_PATH) as conn:
         cursor = conn.cursor()
         
         # Fecha límite
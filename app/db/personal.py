@@ -2,20 +2,21 @@
 Gestión de base de datos para agenda personal (citas y tareas).
 Cada usuario tiene su propia agenda aislada.
 """
+import os
 from pathlib import Path
-import sqlite3
 from typing import Optional, List
 from datetime import datetime, date
+from .pool import connect
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
-FEEDBACK_DIR = BASE_DIR / "feedback"
+FEEDBACK_DIR = Path(os.getenv("APP_DATA_DIR", BASE_DIR / "feedback"))
 PERSONAL_DB_PATH = FEEDBACK_DIR / "personal.sqlite"
 
 FEEDBACK_DIR.mkdir(exist_ok=True)
 
 def init_personal_db():
     """Inicializa la base de datos de agenda personal con aislamiento por usuario."""
-    with sqlite3.connect(str(PERSONAL_DB_PATH)) as conn:
+    with connect(PERSONAL_DB_PATH) as conn:
         cursor = conn.cursor()
         
         # Tabla de citas/appointments
@@ -98,7 +99,7 @@ def create_appointment(
     reminder_minutes: int = 15
 ) -> int:
     """Crea una nueva cita para un usuario."""
-    with sqlite3.connect(str(PERSONAL_DB_PATH)) as conn:
+    with connect(PERSONAL_DB_PATH) as conn:
         cursor = conn.cursor()
         cursor.execute("""
             INSERT INTO appointments 
@@ -109,9 +110,62 @@ def create_appointment(
         return cursor.lastrowid
 
 
+def create_appointments_bulk(user_id: int, items: List[dict]) -> int:
+    """
+    Crea varias citas para un usuario en una sola transacción.
+    
+    Args:
+        user_id: ID del usuario dueño de las citas
+        items: Lista de dicts con los mismos campos que create_appointment
+        
+    Returns:
+        Número de citas creadas
+    """
+    rows = [
+        (
+            user_id,
+            item["title"],
+            item.get("description"),
+            item["start_datetime"],
+            item.get("end_datetime"),
+            item.get("location"),
+            item.get("attendees"),
+            item.get("reminder_minutes", 15)
+        )
+        for item in items
+    ]
+    with connect(PERSONAL_DB_PATH) as conn:
+        cursor = conn.cursor()
+        cursor.executemany("""
+            INSERT INTO appointments 
+            (user_id, title, description, start_datetime, end_datetime, location, attendees, reminder_minutes)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+        conn.commit()
+        return cursor.rowcount
+
+
+def _row_to_appointment(row) -> dict:
+    """Convierte una fila de appointments (columnas en el orden de los SELECT) en diccionario."""
+    return {
+        "id": row[0],
+        "user_id": row[1],
+        "title": row[2],
+        "description": row[3],
+        "start_datetime": row[4],
+        "end_datetime": row[5],
+        "location": row[6],
+        "attendees": row[7],
+        "reminder_minutes": row[8],
+        "status": row[9],
+        "created_at": row[10],
+        "updated_at": row[11]
+    }
+
+
 def get_appointment(appointment_id: int, user_id: int) -> Optional[dict]:
     """Obtiene una cita por ID, verificando que pertenezca al usuario."""
-    with sqlite3.connect(str(PERSONAL_DB_PATH)) as conn:
+    with connect(PERSONAL_DB_PATH) as conn:
         cursor = conn.cursor()
         cursor.execute("""
             SELECT id, user_id, title, description, start_datetime, end_datetime, 
@@ -121,20 +175,7 @@ def get_appointment(appointment_id: int, user_id: int) -> Optional[dict]:
         """, (appointment_id, user_id))
         row = cursor.fetchone()
         if row:
-            return {
-                "id": row[0],
-                "user_id": row[1],
-                "title": row[2],
-                "description": row[3],
-                "start_datetime": row[4],
-                "end_datetime": row[5],
-                "location": row[6],
-                "attendees": row[7],
-                "reminder_minutes": row[8],
-                "status": row[9],
-                "created_at": row[10],
-                "updated_at": row[11]
-            }
+            return _row_to_appointment(row)
         return None
 
 
@@ -145,7 +186,7 @@ def list_appointments(
     status: str = None
 ) -> List[dict]:
     """Lista las citas de un usuario con filtros opcionales."""
-    with sqlite3.connect(str(PERSONAL_DB_PATH)) as conn:
+    with connect(PERSONAL_DB_PATH) as conn:
         cursor = conn.cursor()
         
         query = """
@@ -173,23 +214,25 @@ def list_appointments(
         cursor.execute(query, params)
         appointments = []
         for row in cursor.fetchall():
-            appointments.append({
-                "id": row[0],
-                "user_id": row[1],
-                "title": row[2],
-                "description": row[3],
-                "start_datetime": row[4],
-                "end_datetime": row[5],
-                "location": row[6],
-                "attendees": row[7],
-                "reminder_minutes": row[8],
-                "status": row[9],
-                "created_at": row[10],
-                "updated_at": row[11]
-            })
+            appointments.append(_row_to_appointment(row))
         return appointments
 
 
+def list_appointments_recent(user_id: int, limit: int = 3) -> List[dict]:
+    """Lista las últimas citas creadas por un usuario (más reciente primero)."""
+    with connect(PERSONAL_DB_PATH) as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT id, user_id, title, description, start_datetime, end_datetime,
+                   location, attendees, reminder_minutes, status, created_at, updated_at
+            FROM appointments
+            WHERE user_id = ?
+            ORDER BY id DESC
+            LIMIT ?
+        """, (user_id, limit))
+        return [_row_to_appointment(row) for row in cursor.fetchall()]
+
+
 def update_appointment(
     appointment_id: int,
     user_id: int,
@@ -203,7 +246,7 @@ def update_appointment(
     status: str = None
 ) -> bool:
     """Actualiza una cita, verificando que pertenezca al usuario."""
-    with sqlite3.connect(str(PERSONAL_DB_PATH)) as conn:
+    with connect(PERSONAL_DB_PATH) as conn:
         cursor = conn.cursor()
         
         updates = []
@@ -249,7 +292,7 @@ def update_appointment(
 
 def delete_appointment(appointment_id: int, user_id: int) -> bool:
     """Elimina una cita, verificando que pertenezca al usuario."""
-    with sqlite3.connect(str(PERSONAL_DB_PATH)) as conn:
+    with connect(PERSONAL_DB_PATH) as conn:
         cursor = conn.cursor()
         cursor.execute("DELETE FROM appointments WHERE id = ? AND user_id = ?", (appointment_id, user_id))
         conn.commit()
@@ -258,7 +301,7 @@ def delete_appointment(appointment_id: int, user_id: int) -> bool:
 
 def get_appointments_count(user_id: int, status: str = None) -> int:
     """Cuenta las citas de un usuario."""
-    with sqlite3.connect(str(PERSONAL_DB_PATH)) as conn:
+    with connect(PERSONAL_DB_PATH) as conn:
         cursor = conn.cursor()
         query = "SELECT COUNT(*) FROM appointments WHERE user_id = ?"
         params = [user_id]
@@ -283,7 +326,7 @@ def create_task(
     reminder_minutes: int = 60
 ) -> int:
     """Crea una nueva tarea para un usuario."""
-    with sqlite3.connect(str(PERSONAL_DB_PATH)) as conn:
+    with connect(PERSONAL_DB_PATH) as conn:
         cursor = conn.cursor()
         cursor.execute("""
             INSERT INTO tasks 
@@ -294,9 +337,61 @@ def create_task(
         return cursor.lastrowid
 
 
+def create_tasks_bulk(user_id: int, items: List[dict]) -> int:
+    """
+    Crea varias tareas para un usuario en una sola transacción.
+    
+    Args:
+        user_id: ID del usuario dueño de las tareas
+        items: Lista de dicts con los mismos campos que create_task
+        
+    Returns:
+        Número de tareas creadas
+    """
+    rows = [
+        (
+            user_id,
+            item["title"],
+            item.get("description"),
+            item.get("due_date"),
+            item.get("priority", "medium"),
+            item.get("category"),
+            item.get("reminder_minutes", 60)
+        )
+        for item in items
+    ]
+    with connect(PERSONAL_DB_PATH) as conn:
+        cursor = conn.cursor()
+        cursor.executemany("""
+            INSERT INTO tasks 
+            (user_id, title, description, due_date, priority, category, reminder_minutes)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+        conn.commit()
+        return cursor.rowcount
+
+
+def _row_to_task(row) -> dict:
+    """Convierte una fila de tasks (columnas en el orden de los SELECT) en diccionario."""
+    return {
+        "id": row[0],
+        "user_id": row[1],
+        "title": row[2],
+        "description": row[3],
+        "due_date": row[4],
+        "priority": row[5],
+        "status": row[6],
+        "category": row[7],
+        "reminder_minutes": row[8],
+        "created_at": row[9],
+        "updated_at": row[10],
+        "completed_at": row[11]
+    }
+
+
 def get_task(task_id: int, user_id: int) -> Optional[dict]:
     """Obtiene una tarea por ID, verificando que pertenezca al usuario."""
-    with sqlite3.connect(str(PERSONAL_DB_PATH)) as conn:
+    with connect(PERSONAL_DB_PATH) as conn:
         cursor = conn.cursor()
         cursor.execute("""
             SELECT id, user_id, title, description, due_date, priority, status,
@@ -306,20 +401,7 @@ def get_task(task_id: int, user_id: int) -> Optional[dict]:
         """, (task_id, user_id))
         row = cursor.fetchone()
         if row:
-            return {
-                "id": row[0],
-                "user_id": row[1],
-                "title": row[2],
-                "description": row[3],
-                "due_date": row[4],
-                "priority": row[5],
-                "status": row[6],
-                "category": row[7],
-                "reminder_minutes": row[8],
-                "created_at": row[9],
-                "updated_at": row[10],
-                "completed_at": row[11]
-            }
+            return _row_to_task(row)
         return None
 
 
@@ -330,7 +412,7 @@ def list_tasks(
     category: str = None
 ) -> List[dict]:
     """Lista las tareas de un usuario con filtros opcionales."""
-    with sqlite3.connect(str(PERSONAL_DB_PATH)) as conn:
+    with connect(PERSONAL_DB_PATH) as conn:
         cursor = conn.cursor()
         
         query = """
@@ -358,23 +440,25 @@ def list_tasks(
         cursor.execute(query, params)
         tasks = []
         for row in cursor.fetchall():
-            tasks.append({
-                "id": row[0],
-                "user_id": row[1],
-                "title": row[2],
-                "description": row[3],
-                "due_date": row[4],
-                "priority": row[5],
-                "status": row[6],
-                "category": row[7],
-                "reminder_minutes": row[8],
-                "created_at": row[9],
-                "updated_at": row[10],
-                "completed_at": row[11]
-            })
+            tasks.append(_row_to_task(row))
         return tasks
 
 
+def list_tasks_recent(user_id: int, limit: int = 4) -> List[dict]:
+    """Lista las últimas tareas creadas por un usuario (más reciente primero)."""
+    with connect(PERSONAL_DB_PATH) as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT id, user_id, title, description, due_date, priority, status,
+                   category, reminder_minutes, created_at, updated_at, completed_at
+            FROM tasks
+            WHERE user_id = ?
+            ORDER BY id DESC
+            LIMIT ?
+        """, (user_id, limit))
+        return [_row_to_task(row) for row in cursor.fetchall()]
+
+
 def update_task(
     task_id: int,
     user_id: int,
@@ -387,7 +471,7 @@ def update_task(
     reminder_minutes: int = None
 ) -> bool:
     """Actualiza una tarea, verificando que pertenezca al usuario."""
-    with sqlite3.connect(str(PERSONAL_DB_PATH)) as conn:
+    with connect(PERSONAL_DB_PATH) as conn:
         cursor = conn.cursor()
         
         updates = []
@@ -433,7 +517,7 @@ def update_task(
 
 def delete_task(task_id: int, user_id: int) -> bool:
     """Elimina una tarea, verificando que pertenezca al usuario."""
-    with sqlite3.connect(str(PERSONAL_DB_PATH)) as conn:
+    with connect(PERSONAL_DB_PATH) as conn:
         cursor = conn.cursor()
         cursor.execute("DELETE FROM tasks WHERE id = ? AND user_id = ?", (task_id, user_id))
         conn.commit()
@@ -442,7 +526,7 @@ def delete_task(task_id: int, user_id: int) -> bool:
 
 def get_tasks_count(user_id: int, status: str = None) -> int:
     """Cuenta las tareas de un usuario."""
-    with sqlite3.connect(str(PERSONAL_DB_PATH)) as conn:
+    with connect(PERSONAL_DB_PATH) as conn:
         cursor = conn.cursor()
         query = "SELECT COUNT(*) FROM tasks WHERE user_id = ?"
         params = [user_id]
@@ -457,7 +541,7 @@ def get_tasks_count(user_id: int, status: str = None) -> int:
 
 def get_task_categories(user_id: int) -> List[str]:
     """Obtiene todas las categorías únicas de tareas de un usuario."""
-    with sqlite3.connect(str(PERSONAL_DB_PATH)) as conn:
+    with connect(PERSONAL_DB_PATH) as conn:
         cursor = conn.cursor()
         cursor.execute("""
             SELECT DISTINCT category 
@@ -0,0 +1,81 @@
+"""
+Conexiones SQLite reutilizables para los módulos de app.db.
+
+Por defecto cada llamada abre una conexión nueva (comportamiento histórico).
+Con el pool activado (SQLITE_POOL=1 o enable_pool()) cada hilo reutiliza una
+conexión por archivo, en modo WAL y con synchronous=NORMAL. Como la conexión
+vive toda la sesión, su caché de páginas se conserva entre consultas.
+"""
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Tuple, Union
+
+_pool_enabled = os.getenv("SQLITE_POOL") == "1"
+_connections: Dict[Tuple[int, str], sqlite3.Connection] = {}
+_lock = threading.Lock()
+
+# PRAGMAs de las conexiones reutilizadas: caché de páginas de 64 MB (valor
+# negativo = KiB), lecturas vía mmap y tablas temporales en memoria
+_POOL_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA temp_store=MEMORY",
+)
+
+
+def enable_pool(enabled: bool = True):
+    """Activa o desactiva la reutilización de conexiones."""
+    global _pool_enabled
+    _pool_enabled = enabled
+    if not enabled:
+        close_all()
+
+
+def connect(path: Union[str, Path]) -> sqlite3.Connection:
+    """
+    Retorna una conexión al archivo SQLite indicado.
+
+    Se usa igual que sqlite3.connect (`with connect(path) as conn:`): el bloque
+    with hace commit/rollback pero no cierra la conexión, así que con el pool
+    activo la misma conexión sirve a las siguientes llamadas del hilo.
+
+    Args:
+        path: Ruta del archivo de base de datos
+
+    Returns:
+        Conexión nueva o la conexión reutilizada del hilo actual
+    """
+    if not _pool_enabled:
+        return sqlite3.connect(str(path))
+
+    key = (threading.get_ident(), str(path))
+    conn = _connections.get(key)
+    if conn is None:
+        conn = sqlite3.connect(str(path), check_same_thread=False)
+        for pragma in _POOL_PRAGMAS:
+            conn.execute(pragma)
+        with _lock:
+            _connections[key] = conn
+    return conn
+
+
+def close_all():
+    """
+    Cierra todas las conexiones reutilizadas (p. ej. antes de borrar archivos).
+    
+    Antes de cerrar ejecuta PRAGMA optimize, que actualiza las estadísticas
+    del planificador con lo aprendido durante la vida de la conexión.
+    """
+    with _lock:
+        connections = list(_connections.values())
+        _connections.clear()
+    for conn in connections:
+        try:
+            conn.execute("PRAGMA optimize")
+        except sqlite3.Error:
+            pass
+        conn.close()
@@ -2,20 +2,21 @@
 Gestión de base de datos para productos comerciales.
 Cada usuario tiene su propio catálogo de productos aislado.
 """
+import os
 from pathlib import Path
-import sqlite3
 from typing import Optional, List
 from datetime import datetime
+from .pool import connect
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
-FEEDBACK_DIR = BASE_DIR / "feedback"
+FEEDBACK_DIR = Path(os.getenv("APP_DATA_DIR", BASE_DIR / "feedback"))
 PRODUCTS_DB_PATH = FEEDBACK_DIR / "products.sqlite"
 
 FEEDBACK_DIR.mkdir(exist_ok=True)
 
 def init_products_db():
     """Inicializa la base de datos de productos con aislamiento por usuario."""
-    with sqlite3.connect(str(PRODUCTS_DB_PATH)) as conn:
+    with connect(PRODUCTS_DB_PATH) as conn:
         cursor = conn.cursor()
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS products (
@@ -66,7 +67,7 @@ def create_product(
     active: bool = True
 ) -> int:
     """Crea un nuevo producto para un usuario."""
-    with sqlite3.connect(str(PRODUCTS_DB_PATH)) as conn:
+    with connect(PRODUCTS_DB_PATH) as conn:
         cursor = conn.cursor()
         cursor.execute("""
             INSERT INTO products (user_id, name, description, price, sku, category, stock, active)
@@ -76,9 +77,60 @@ def create_product(
         return cursor.lastrowid
 
 
+def create_products_bulk(user_id: int, items: List[dict]) -> int:
+    """
+    Crea varios productos para un usuario en una sola transacción.
+    
+    Args:
+        user_id: ID del usuario dueño de los productos
+        items: Lista de dicts con los mismos campos que create_product
+        
+    Returns:
+        Número de productos creados
+    """
+    rows = [
+        (
+            user_id,
+            item["name"],
+            item.get("description"),
+            item["price"],
+            item.get("sku"),
+            item.get("category"),
+            item.get("stock", 0),
+            1 if item.get("active", True) else 0
+        )
+        for item in items
+    ]
+    with connect(PRODUCTS_DB_PATH) as conn:
+        cursor = conn.cursor()
+        cursor.executemany("""
+            INSERT INTO products (user_id, name, description, price, sku, category, stock, active)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+        conn.commit()
+        return cursor.rowcount
+
+
+def _row_to_product(row) -> dict:
+    """Convierte una fila de products (columnas en el orden de los SELECT) en diccionario."""
+    return {
+        "id": row[0],
+        "user_id": row[1],
+        "name": row[2],
+        "description": row[3],
+        "price": row[4],
+        "sku": row[5],
+        "category": row[6],
+        "stock": row[7],
+        "active": bool(row[8]),
+        "created_at": row[9],
+        "updated_at": row[10]
+    }
+
+
 def get_product(product_id: int, user_id: int) -> Optional[dict]:
     """Obtiene un producto por ID, verificando que pertenezca al usuario."""
-    with sqlite3.connect(str(PRODUCTS_DB_PATH)) as conn:
+    with connect(PRODUCTS_DB_PATH) as conn:
         cursor = conn.cursor()
         cursor.execute("""
             SELECT id, user_id, name, description, price, sku, category, stock, active, created_at, updated_at
@@ -87,19 +139,7 @@ def get_product(product_id: int, user_id: int) -> Optional[dict]:
         """, (product_id, user_id))
         row = cursor.fetchone()
         if row:
-            return {
-                "id": row[0],
-                "user_id": row[1],
-                "name": row[2],
-                "description": row[3],
-                "price": row[4],
-                "sku": row[5],
-                "category": row[6],
-                "stock": row[7],
-                "active": bool(row[8]),
-                "created_at": row[9],
-                "updated_at": row[10]
-            }
+            return _row_to_product(row)
         return None
 
 
@@ -110,7 +150,7 @@ def list_products(
     search: str = None
 ) -> List[dict]:
     """Lista todos los productos de un usuario con filtros opcionales."""
-    with sqlite3.connect(str(PRODUCTS_DB_PATH)) as conn:
+    with connect(PRODUCTS_DB_PATH) as conn:
         cursor = conn.cursor()
         
         query = """
@@ -137,22 +177,32 @@ def list_products(
         cursor.execute(query, params)
         products = []
         for row in cursor.fetchall():
-            products.append({
-                "id": row[0],
-                "user_id": row[1],
-                "name": row[2],
-                "description": row[3],
-                "price": row[4],
-                "sku": row[5],
-                "category": row[6],
-                "stock": row[7],
-                "active": bool(row[8]),
-                "created_at": row[9],
-                "updated_at": row[10]
-            })
+            products.append(_row_to_product(row))
         return products
 
 
+def list_products_recent(user_id: int, limit: int = 3, active_only: bool = True) -> List[dict]:
+    """Lista los últimos productos creados por un usuario (más reciente primero)."""
+    with connect(PRODUCTS_DB_PATH) as conn:
+        cursor = conn.cursor()
+        
+        query = """
+            SELECT id, user_id, name, description, price, sku, category, stock, active, created_at, updated_at
+            FROM products
+            WHERE user_id = ?
+        """
+        params = [user_id]
+        
+        if active_only:
+            query += " AND active = 1"
+        
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        
+        cursor.execute(query, params)
+        return [_row_to_product(row) for row in cursor.fetchall()]
+
+
 def update_product(
     product_id: int,
     user_id: int,
@@ -165,7 +215,7 @@ def update_product(
     active: bool = None
 ) -> bool:
     """Actualiza un producto, verificando que pertenezca al usuario."""
-    with sqlite3.connect(str(PRODUCTS_DB_PATH)) as conn:
+    with connect(PRODUCTS_DB_PATH) as conn:
         cursor = conn.cursor()
         
         # Construir query dinámicamente con los campos a actualizar
@@ -209,7 +259,7 @@ def update_product(
 
 def delete_product(product_id: int, user_id: int) -> bool:
     """Elimina un producto (soft delete), verificando que pertenezca al usuario."""
-    with sqlite3.connect(str(PRODUCTS_DB_PATH)) as conn:
+    with connect(PRODUCTS_DB_PATH) as conn:
         cursor = conn.cursor()
         cursor.execute("""
             UPDATE products 
@@ -222,7 +272,7 @@ def delete_product(product_id: int, user_id: int) -> bool:
 
 def hard_delete_product(product_id: int, user_id: int) -> bool:
     """Elimina permanentemente un producto, verificando que pertenezca al usuario."""
-    with sqlite3.connect(str(PRODUCTS_DB_PATH)) as conn:
+    with connect(PRODUCTS_DB_PATH) as conn:
         cursor = conn.cursor()
         cursor.execute("DELETE FROM products WHERE id = ? AND user_id = ?", (product_id, user_id))
         conn.commit()
@@ -231,7 +281,7 @@ def hard_delete_product(product_id: int, user_id: int) -> bool:
 
 def get_categories(user_id: int) -> List[str]:
     """Obtiene todas las categorías únicas de productos de un usuario."""
-    with sqlite3.connect(str(PRODUCTS_DB_PATH)) as conn:
+    with connect(PRODUCTS_DB_PATH) as conn:
         cursor = conn.cursor()
         cursor.execute("""
             SELECT DISTINCT category 
@@ -244,7 +294,7 @@ def get_categories(user_id: int) -> List[str]:
 
 def get_product_count(user_id: int, active_only: bool = True) -> int:
     """Cuenta los productos de un usuario."""
-    with sqlite3.connect(str(PRODUCTS_DB_PATH)) as conn:
+    with connect(PRODUCTS_DB_PATH) as conn:
         cursor = conn.cursor()
         query = "SELECT COUNT(*) FROM products WHERE user_id = ?"
         params = [user_id]
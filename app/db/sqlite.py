@@ -1,16 +1,18 @@
+import os
 from pathlib import Path
-import sqlite3
 from typing import Optional
+from .pool import connect
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
-FEEDBACK_DIR = BASE_DIR / "feedback"
+# APP_DATA_DIR permite aislar las bases (p. ej. una por worker de pytest-xdist)
+FEEDBACK_DIR = Path(os.getenv("APP_DATA_DIR", BASE_DIR / "feedback"))
 FEEDBACK_DB_PATH = FEEDBACK_DIR / "feedback.sqlite"
 USER_DB_PATH = FEEDBACK_DIR / "users.sqlite"
 
 FEEDBACK_DIR.mkdir(exist_ok=True)
 
 def init_feedback_db():
-    with sqlite3.connect(str(FEEDBACK_DB_PATH)) as conn:
+    with connect(FEEDBACK_DB_PATH) as conn:
         cursor = conn.cursor()
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS feedback (
@@ -23,7 +25,7 @@ def init_feedback_db():
 
 def init_user_db():
     """Inicializa la base de datos de usuarios con soporte para roles."""
-    with sqlite3.connect(str(USER_DB_PATH)) as conn:
+    with connect(USER_DB_PATH) as conn:
         cursor = conn.cursor()
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS users (
@@ -49,20 +51,20 @@ def init_user_db():
         conn.commit()
 
 def store_feedback(text: str):
-    with sqlite3.connect(str(FEEDBACK_DB_PATH)) as conn:
+    with connect(FEEDBACK_DB_PATH) as conn:
         cursor = conn.cursor()
         cursor.execute("INSERT INTO feedback (text) VALUES (?)", (text,))
         conn.commit()
 
 def get_feedback_lines():
-    with sqlite3.connect(str(FEEDBACK_DB_PATH)) as conn:
+    with connect(FEEDBACK_DB_PATH) as conn:
         cursor = conn.cursor()
         cursor.execute("SELECT text FROM feedback")
         return [r[0] for r in cursor.fetchall()]
 
 def create_user(username: str, hashed_password: str, is_admin: bool = False, role: str = None):
     """Crea un nuevo usuario con soporte para roles."""
-    with sqlite3.connect(str(USER_DB_PATH)) as conn:
+    with connect(USER_DB_PATH) as conn:
         cursor = conn.cursor()
         # Determinar role: usar parámetro role o inferir de is_admin
         user_role = role if role else ('superadmin' if is_admin else 'user')
@@ -74,7 +76,7 @@ def create_user(username: str, hashed_password: str, is_admin: bool = False, rol
 
 def get_user(username: str) -> Optional[dict]:
     """Obtiene un usuario por username incluyendo su role."""
-    with sqlite3.connect(str(USER_DB_PATH)) as conn:
+    with connect(USER_DB_PATH) as conn:
         cursor = conn.cursor()
         cursor.execute(
             "SELECT id, username, hashed_password, is_admin, role FROM users WHERE username = ?", 
@@ -93,7 +95,7 @@ def get_user(username: str) -> Optional[dict]:
 
 def is_first_user() -> bool:
     """Verifica si la tabla users está vacía (primer usuario)."""
-    with sqlite3.connect(str(USER_DB_PATH)) as conn:
+    with connect(USER_DB_PATH) as conn:
         cursor = conn.cursor()
         cursor.execute("SELECT COUNT(*) FROM users")
         count = cursor.fetchone()[0]
@@ -101,7 +103,7 @@ def is_first_user() -> bool:
 
 def set_admin(username: str, is_admin: bool):
     """Establece el estado de administrador de un usuario (actualiza is_admin y role)."""
-    with sqlite3.connect(str(USER_DB_PATH)) as conn:
+    with connect(USER_DB_PATH) as conn:
         cursor = conn.cursor()
         role = 'superadmin' if is_admin else 'user'
         cursor.execute(
@@ -117,7 +119,7 @@ def set_user_role(username: str, role: str):
     if role not in ['user', 'superadmin']:
         raise ValueError(f"Role inválido: {role}. Debe ser 'user' o 'superadmin'")
     
-    with sqlite3.connect(str(USER_DB_PATH)) as conn:
+    with connect(USER_DB_PATH) as conn:
         cursor = conn.cursor()
         is_admin = 1 if role == 'superadmin' else 0
         cursor.execute(
@@ -130,7 +132,7 @@ def set_user_role(username: str, role: str):
 
 def list_users_with_roles() -> list[dict]:
     """Lista todos los usuarios con sus roles."""
-    with sqlite3.connect(str(USER_DB_PATH)) as conn:
+    with connect(USER_DB_PATH) as conn:
         cursor = conn.cursor()
         cursor.execute("SELECT id, username, is_admin, role, created_at FROM users")
         users = []
@@ -146,7 +148,7 @@ def list_users_with_roles() -> list[dict]:
 
 def get_user_by_id(user_id: int) -> Optional[dict]:
     """Obtiene un usuario por ID."""
-    with sqlite3.connect(str(USER_DB_PATH)) as conn:
+    with connect(USER_DB_PATH) as conn:
         cursor = conn.cursor()
         cursor.execute(
             "SELECT id, username, hashed_password, is_admin, role FROM users WHERE id = ?",
@@ -165,7 +167,7 @@ def get_user_by_id(user_id: int) -> Optional[dict]:
 
 def update_user_password(username: str, new_hashed_password: str):
     """Actualiza la contraseña de un usuario."""
-    with sqlite3.connect(str(USER_DB_PATH)) as conn:
+    with connect(USER_DB_PATH) as conn:
         cursor = conn.cursor()
         cursor.execute("UPDATE users SET hashed_password = ? WHERE username = ?", 
                       (new_hashed_password, username))
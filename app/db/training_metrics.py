@@ -2,6 +2,7 @@
 Base de datos para métricas de entrenamiento.
 """
 
+import os
 import sqlite3
 from pathlib import Path
 from datetime import datetime, timezone
@@ -11,7 +12,7 @@ import logging
 logger = logging.getLogger(__name__)
 
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
-TRAINING_METRICS_DB = BASE_DIR / "feedback" / "training_metrics.sqlite"
+TRAINING_METRICS_DB = Path(os.getenv("APP_DATA_DIR", BASE_DIR / "feedback")) / "training_metrics.sqlite"
 
 def init_training_metrics_db():
     """Inicializa la base de datos de métricas de entrenamiento."""
@@ -29,15 +29,15 @@ import torch
 from passlib.context import CryptContext
 from fastapi.middleware.cors import CORSMiddleware
 
+# Rutas de las bases SQLite compartidas con la app principal (respetan APP_DATA_DIR)
+from app.db.sqlite import FEEDBACK_DIR, FEEDBACK_DB_PATH, USER_DB_PATH
+
 # Establecer la ruta base del proyecto (dos niveles arriba, ya que este archivo está en app/)
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 # Rutas para archivos y carpetas (definidas de forma absoluta)
 CONFIG_PATH = BASE_DIR / "config" / "config.json"
 MODEL_DIR = BASE_DIR / "model_llm"
-FEEDBACK_DIR = BASE_DIR / "feedback"
-FEEDBACK_DB_PATH = FEEDBACK_DIR / "feedback.sqlite"
-USER_DB_PATH = FEEDBACK_DIR / "users.sqlite"
 
 # Variables globales para el modelo y su configuración
 MODEL = None
@@ -306,4 +306,4 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     return {"access_token": access_token, "token_type": "bearer"}
 
 if __name__ == "__main__":
-    uvicorn.run("llm_api:app", host="0.0.0.0", port=8000, reload=True)
+    uvicorn.run("app.llm_api:app", host="0.0.0.0", port=8000, reload=True)
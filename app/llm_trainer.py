@@ -19,6 +19,8 @@ import json
 import time
 import sqlite3
 import shutil
+import threading
+from contextlib import closing
 from pathlib import Path
 
 import pandas as pd
@@ -44,6 +46,15 @@ MODEL_DIR = BASE_DIR / "model_llm"
 FEEDBACK_DB = BASE_DIR / "feedback" / "feedback.sqlite"
 SUPPORTED_EXTENSIONS = {".txt", ".pdf", ".csv", ".json", ".xlsx", ".xls", ".docx"}
 
+# Modelos y tokenizers ya cargados en esta sesión, indexados por nombre de modelo.
+_TOKENIZER_CACHE = {}
+_MODEL_CACHE = {}
+# Modelos cuya instancia en caché ya se entregó para fine tuning (pesos alterados).
+_TRAINED_MODELS = set()
+# Copia en CPU de los pesos originales de cada modelo entrenado, para restaurarlos
+# sin volver a leerlos de disco.
+_ORIGINAL_STATE = {}
+
 
 def load_config():
     if CONFIG_PATH.exists():
@@ -70,23 +81,32 @@ def save_config(config):
         logger.error(f"Error saving config: {e}")
 
 
+def join_columns(df):
+    """Une las columnas de cada fila en una línea, columna a columna (vectorizado)."""
+    if df.empty or len(df.columns) == 0:
+        return []
+    cols = [df[c].astype("string").fillna("") for c in df.columns]
+    joined = cols[0]
+    for col in cols[1:]:
+        joined = joined.str.cat(col, sep=" ")
+    return joined.tolist()
+
+
 def parse_file(file_path: Path):
     ext = file_path.suffix.lower()
     try:
         if ext == ".txt":
             return file_path.read_text(encoding="utf-8").splitlines()
         elif ext == ".pdf":
-            text = ""
+            lines = []
             with fitz.open(str(file_path)) as doc:
                 for page in doc:
-                    text += page.get_text()
-            return text.splitlines()
+                    lines.extend(page.get_text("text", flags=fitz.TEXTFLAGS_TEXT).splitlines())
+            return lines
         elif ext == ".csv":
-            df = pd.read_csv(file_path)
-            return df.astype(str).apply(lambda row: " ".join(row), axis=1).tolist()
+            return join_columns(pd.read_csv(file_path))
         elif ext == ".json":
-            df = pd.read_json(file_path)
-            return df.astype(str).apply(lambda row: " ".join(row), axis=1).tolist()
+            return join_columns(pd.read_json(file_path))
         elif ext in [".xlsx", ".xls"]:
             wb = load_workbook(file_path, read_only=True)
             sheet = wb.active
@@ -135,6 +155,54 @@ def collect_training_data(directory: Path):
     return texts, file_count, line_count
 
 
+def get_model_and_tokenizer(model_name: str, for_training: bool = True):
+    """
+    Devuelve el tokenizer y el modelo preentrenado.
+    Se mantiene una única instancia por modelo en memoria. Antes de entregarla
+    para fine tuning se guarda una copia de sus pesos en CPU; si una sesión
+    anterior ya los alteró, se restauran con load_state_dict en lugar de
+    recargar el modelo desde disco.
+    
+    Args:
+        model_name: Nombre del modelo preentrenado
+        for_training: Si el modelo se va a entrenar (sus pesos dejarán de ser los originales)
+    """
+    tokenizer = _TOKENIZER_CACHE.get(model_name)
+    if tokenizer is None:
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        # Si el tokenizer no tiene un token de padding, se asigna el token de fin de secuencia (eos).
+        if tokenizer.pad_token is None:
+            tokenizer.pad_token = tokenizer.eos_token
+        _TOKENIZER_CACHE[model_name] = tokenizer
+    model = _MODEL_CACHE.get(model_name)
+    if model is None:
+        model = AutoModelForCausalLM.from_pretrained(model_name)
+        _MODEL_CACHE[model_name] = model
+    elif model_name in _TRAINED_MODELS:
+        # Restaurar los pesos originales sobre la misma instancia
+        model.load_state_dict(_ORIGINAL_STATE[model_name])
+        _TRAINED_MODELS.discard(model_name)
+    if for_training:
+        if model_name not in _ORIGINAL_STATE:
+            _ORIGINAL_STATE[model_name] = {
+                key: tensor.detach().to("cpu", copy=True)
+                for key, tensor in model.state_dict().items()
+            }
+        _TRAINED_MODELS.add(model_name)
+        model.train()
+    else:
+        model.eval()
+    return tokenizer, model
+
+
+def clear_model_cache():
+    """Libera los modelos y tokenizers cargados en memoria."""
+    _TOKENIZER_CACHE.clear()
+    _MODEL_CACHE.clear()
+    _TRAINED_MODELS.clear()
+    _ORIGINAL_STATE.clear()
+
+
 def load_model():
     """
     Carga el modelo preentrenado basado en la configuración.
@@ -144,8 +212,7 @@ def load_model():
     model_name = config.get("selected_model", "gpt2")
     logger.info(f"Loading pretrained model: {model_name}")
     try:
-        tokenizer = AutoTokenizer.from_pretrained(model_name)
-        model = AutoModelForCausalLM.from_pretrained(model_name)
+        get_model_and_tokenizer(model_name, for_training=False)
         logger.info("Pretrained model loaded successfully.")
     except Exception as e:
         logger.error(f"Error loading model {model_name}: {e}")
@@ -157,30 +224,23 @@ def train_model(model_name: str, training_data: list):
         return
     try:
         logger.info(f"Starting training with model {model_name}...")
-        tokenizer = AutoTokenizer.from_pretrained(model_name)
-        model = AutoModelForCausalLM.from_pretrained(model_name)
-        # Si el tokenizer no tiene un token de padding, se asigna el token de fin de secuencia (eos).
-        if tokenizer.pad_token is None:
-            tokenizer.pad_token = tokenizer.eos_token
+        tokenizer, model = get_model_and_tokenizer(model_name)
     except Exception as e:
         logger.error(f"Error loading model {model_name}: {e}")
         return
 
-    # Función de tokenización actualizada para incluir los labels.
+    # Tokenización sin padding: el collator rellena cada batch y genera los labels.
     def tokenize_function(example):
-        tokenized = tokenizer(
+        return tokenizer(
             example["text"],
-            padding="max_length",
             truncation=True,
             max_length=128
         )
-        tokenized["labels"] = tokenized["input_ids"].copy()  # Se asignan los labels
-        return tokenized
 
     try:
         logger.info("Preparing dataset...")
         raw_dataset = Dataset.from_dict({"text": training_data})
-        tokenized = raw_dataset.map(tokenize_function, batched=True)
+        tokenized = raw_dataset.map(tokenize_function, batched=True, remove_columns=["text"])
     except Exception as e:
         logger.error(f"Error preparing dataset: {e}")
         return
@@ -203,14 +263,15 @@ def train_model(model_name: str, training_data: list):
         overwrite_output_dir=True,
         num_train_epochs=num_train_epochs,
         per_device_train_batch_size=per_device_train_batch_size,
-        save_steps=10,
-        save_total_limit=2,
+        save_strategy="epoch",
+        save_total_limit=1,
+        save_safetensors=True,
         logging_dir=str(output_path / "logs"),
         logging_steps=5,
     )
 
     # Se utiliza DataCollatorForLanguageModeling para evitar el warning de deprecación en Trainer.
-    data_collator = DataCollatorForLanguageModeling(tokenizer=tokenizer, mlm=False)
+    data_collator = DataCollatorForLanguageModeling(tokenizer=tokenizer, mlm=False, pad_to_multiple_of=8)
 
     try:
         logger.info("Training the model...")
@@ -249,24 +310,24 @@ def retrain_with_feedback():
         logger.error("Feedback database not found.")
         return
     try:
-        conn = sqlite3.connect(str(FEEDBACK_DB))
-        cursor = conn.cursor()
-        cursor.execute("SELECT text FROM feedback;")
-        rows = cursor.fetchall()
-        logger.info(f"Feedback available: {len(rows)} lines")
-        if not rows:
+        # El context manager de sqlite3 solo cierra la transacción: closing cierra la conexión
+        with closing(sqlite3.connect(str(FEEDBACK_DB))) as conn:
+            # Devolver directamente la columna, sin envolver cada fila en una tupla
+            conn.row_factory = lambda cursor, row: row[0]
+            data = list(conn.execute(
+                "SELECT text FROM feedback WHERE text IS NOT NULL AND length(text) > 0"
+            ))
+        logger.info(f"Feedback available: {len(data)} lines")
+        if not data:
             return
         confirm = input("Retrain with feedback? (y/n): ").strip().lower()
         if confirm == "y":
-            data = [r[0] for r in rows]
             model_name = load_config().get("selected_model", "gpt2")
             train_model(model_name, data)
         else:
             logger.info("Retraining canceled.")
     except Exception as e:
         logger.error(f"Feedback error: {e}")
-    finally:
-        conn.close()
 
 
 def delete_trained_model():
@@ -274,7 +335,16 @@ def delete_trained_model():
         confirm = input("Delete trained model and all its data? (y/n): ").strip().lower()
         if confirm == "y":
             try:
-                shutil.rmtree(MODEL_DIR)
+                # Renombrar es instantáneo; el borrado real se hace en segundo plano
+                trash_dir = MODEL_DIR.with_name(f".{MODEL_DIR.name}.trash.{time.strftime('%Y%m%d-%H%M%S')}")
+                MODEL_DIR.rename(trash_dir)
+                threading.Thread(
+                    target=shutil.rmtree,
+                    args=(trash_dir,),
+                    kwargs={"ignore_errors": True},
+                    name="model-trash-cleanup",
+                ).start()
+                clear_model_cache()
                 logger.info("Trained model deleted successfully.")
             except Exception as e:
                 logger.error(f"Error deleting model: {e}")
@@ -315,7 +385,8 @@ def select_pretrained_model():
         if choice_training == "y":
             dialogue_data, _, _ = collect_training_data(DIALOGUE_DIR)
             knowledge_data, _, _ = collect_training_data(KNOWLEDGE_DIR)
-            training_data = dialogue_data + knowledge_data
+            # Eliminar líneas duplicadas conservando el orden
+            training_data = list(dict.fromkeys(dialogue_data + knowledge_data))
             if not training_data:
                 print("Not enough data for training, loading pretrained model without training.")
                 load_model()
@@ -344,7 +415,8 @@ def main_menu():
         elif choice == "3":
             dialogue_data, _, _ = collect_training_data(DIALOGUE_DIR)
             knowledge_data, _, _ = collect_training_data(KNOWLEDGE_DIR)
-            total_data = dialogue_data + knowledge_data
+            # Eliminar líneas duplicadas conservando el orden
+            total_data = list(dict.fromkeys(dialogue_data + knowledge_data))
             print(f"\nTotal lines for training: {len(total_data)}")
             if not total_data:
                 logger.error("No data found for training.")
@@ -1,7 +1,9 @@
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 import os
+import itertools
 import logging
+import time
 from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
 from .api.routers.predict import router as predict_router
@@ -21,7 +23,7 @@ from .db.training_metrics import init_training_metrics_db
 from .db.products import init_products_db
 from .db.personal import init_personal_db
 from .db.conversations import init_conversations_db
-from .models.model_manager import load_model
+from .models.model_manager import load_model, close_provider
 from .core.rate_limit import RateLimiter
 from .core.logging import configure_logging, get_logger, request_id_var
 from .core import metrics
@@ -32,6 +34,25 @@ rate_limiter = RateLimiter(requests=settings.RATE_LIMIT_REQUESTS, window_seconds
 configure_logging(json_mode=True, level=settings.LOG_LEVEL)
 logger = get_logger("app")
 
+# IDs de petición "<pid>-<arranque>-<contador>" en hex: únicos por proceso sin
+# leer os.urandom en cada petición. El prefijo se recalcula en procesos hijos (fork)
+_request_counter = itertools.count()
+_request_id_prefix = ""
+
+
+def _reset_request_ids():
+    global _request_counter, _request_id_prefix
+    _request_counter = itertools.count()
+    _request_id_prefix = f"{os.getpid():x}-{int(time.time()):x}"
+
+
+_reset_request_ids()
+os.register_at_fork(after_in_child=_reset_request_ids)
+
+
+def make_request_id() -> str:
+    return f"{_request_id_prefix}-{next(_request_counter):x}"
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -45,10 +66,17 @@ async def lifespan(app: FastAPI):
     load_model()
     logger.info("Startup complete")
     yield
-    # Shutdown (si es necesario limpiar recursos)
+    # Shutdown: cerrar conexiones persistentes del provider externo
+    await close_provider()
 
 
-app = FastAPI(title="LLM Modular API", version="1.0", lifespan=lifespan)
+# Respuestas JSON serializadas con orjson (más rápido que json de la stdlib)
+app = FastAPI(
+    title="LLM Modular API",
+    version="1.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -60,7 +88,7 @@ app.add_middleware(
 
 @app.middleware("http")
 async def instrumentation_middleware(request: Request, call_next):
-    request_id = request.headers.get("x-request-id") or os.urandom(6).hex()
+    request_id = request.headers.get("x-request-id") or make_request_id()
     request_id_var.set(request_id)
     # Normaliza la ruta para métricas (quita barra final excepto en raíz)
     raw_path = request.url.path
@@ -72,7 +100,7 @@ async def instrumentation_middleware(request: Request, call_next):
         if path.startswith("/predict"):
             identifier = request.headers.get("X-Rate-Key") or ((request.client and request.client.host) or "unknown")
             if not rate_limiter.allow(identifier):
-                response = JSONResponse({"detail": "Rate limit exceeded"}, status_code=429)
+                response = ORJSONResponse({"detail": "Rate limit exceeded"}, status_code=429)
             else:
                 response = await call_next(request)
         else:
@@ -62,7 +62,11 @@ def load_model(force: bool = False):
                     model_to_load = model_name
                 
                 _tokenizer = AutoTokenizer.from_pretrained(model_to_load, clean_up_tokenization_spaces=True)
-                _model = AutoModelForCausalLM.from_pretrained(model_to_load).to(device)
+                _model = AutoModelForCausalLM.from_pretrained(
+                    model_to_load,
+                    torch_dtype="auto",
+                    low_cpu_mem_usage=True
+                ).to(device)
                 
                 # Crear instancia de HuggingFaceProvider para compatibilidad
                 _provider_instance = HuggingFaceProvider(model_name=model_to_load, model=_model, tokenizer=_tokenizer)
@@ -109,6 +113,12 @@ def load_model(force: bool = False):
             _current_model_name = None
             return None
 
+async def close_provider():
+    """Cierra los recursos del provider activo (p. ej. el cliente HTTP de Claude/OpenAI)."""
+    aclose = getattr(_provider_instance, "aclose", None)
+    if aclose is not None:
+        await aclose()
+
 async def generate(prompt: str, max_length: int = 50, num_return_sequences: int = 1, temperature: float = 0.7) -> str:
     # If using external provider (Claude, OpenAI), delegate to provider
     if _provider_instance is not None:
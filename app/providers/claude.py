@@ -14,6 +14,27 @@ class ClaudeProvider(BaseLLMProvider):
         self.model_name = model_name
         self.base_url = "https://api.anthropic.com/v1/messages"
         self.api_version = "2023-06-01"
+        # Headers fijos por instancia: se construyen una vez, no en cada petición
+        self._headers = {
+            "x-api-key": self.api_key,
+            "anthropic-version": self.api_version,
+            "content-type": "application/json"
+        }
+        # Cliente persistente: reutiliza conexiones (TCP+TLS) entre peticiones
+        self._client = httpx.AsyncClient(
+            timeout=30.0,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=100)
+        )
+    
+    async def aclose(self):
+        """Cierra el cliente HTTP y sus conexiones abiertas."""
+        await self._client.aclose()
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
     
     async def generate(
         self,
@@ -35,12 +56,6 @@ class ClaudeProvider(BaseLLMProvider):
         Returns:
             Texto generado por Claude
         """
-        headers = {
-            "x-api-key": self.api_key,
-            "anthropic-version": self.api_version,
-            "content-type": "application/json"
-        }
-        
         # Convertir prompt a formato de mensajes Claude
         if isinstance(prompt, str):
             messages = [{"role": "user", "content": prompt}]
@@ -73,16 +88,15 @@ class ClaudeProvider(BaseLLMProvider):
             payload["system"] = system_message
         
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(self.base_url, json=payload, headers=headers)
-                response.raise_for_status()
-                data = response.json()
-                
-                # Extraer texto de la respuesta
-                if "content" in data and len(data["content"]) > 0:
-                    return data["content"][0]["text"]
-                return "[ERROR] Respuesta vacía de Claude"
-                
+            response = await self._client.post(self.base_url, json=payload, headers=self._headers)
+            response.raise_for_status()
+            data = response.json()
+            
+            # Extraer texto de la respuesta
+            if "content" in data and len(data["content"]) > 0:
+                return data["content"][0]["text"]
+            return "[ERROR] Respuesta vacía de Claude"
+            
         except httpx.HTTPStatusError as e:
             return f"[ERROR] Claude API error {e.response.status_code}: {e.response.text}"
         except httpx.RequestError as e:
@@ -18,6 +18,26 @@ class OpenAIProvider(BaseLLMProvider):
         self.api_key = api_key
         self.model_name = model_name
         self.base_url = base_url
+        # Cabeceras de autenticación, constantes durante la vida del provider
+        self._headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        # Cliente persistente: reutiliza conexiones (TCP+TLS) entre peticiones
+        self._client = httpx.AsyncClient(
+            timeout=30.0,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=100)
+        )
+    
+    async def aclose(self):
+        """Cierra el cliente HTTP y sus conexiones abiertas."""
+        await self._client.aclose()
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
     
     async def generate(
         self,
@@ -39,11 +59,6 @@ class OpenAIProvider(BaseLLMProvider):
         Returns:
             Texto generado por OpenAI
         """
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-        
         # Convertir prompt a formato de mensajes
         if isinstance(prompt, str):
             messages = [{"role": "user", "content": prompt}]
@@ -61,16 +76,15 @@ class OpenAIProvider(BaseLLMProvider):
         }
         
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(self.base_url, json=payload, headers=headers)
-                response.raise_for_status()
-                data = response.json()
-                
-                # Extraer texto de la primera choice
-                if "choices" in data and len(data["choices"]) > 0:
-                    return data["choices"][0]["message"]["content"]
-                return "[ERROR] Respuesta vacía de OpenAI"
-                
+            response = await self._client.post(self.base_url, json=payload, headers=self._headers)
+            response.raise_for_status()
+            data = response.json()
+            
+            # Extraer texto de la primera choice
+            if "choices" in data and len(data["choices"]) > 0:
+                return data["choices"][0]["message"]["content"]
+            return "[ERROR] Respuesta vacía de OpenAI"
+            
         except httpx.HTTPStatusError as e:
             return f"[ERROR] OpenAI API error {e.response.status_code}: {e.response.text}"
         except httpx.RequestError as e:
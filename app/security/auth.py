@@ -15,7 +15,16 @@ ALGORITHM = settings.JWT_ALGORITHM
 SECRET_KEY = settings.SECRET_KEY
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_MINUTES
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Clave y lista de algoritmos preparadas una vez: PyJWT no re-codifica la
+# clave en cada firma/verificación
+_SECRET_KEY_BYTES = SECRET_KEY.encode("utf-8")
+_ALGORITHMS = [ALGORITHM]
+
+# Con TESTING=1 se usa un hash barato: bcrypt es lento a propósito y domina los tests de auth
+if os.getenv("TESTING") == "1":
+    pwd_context = CryptContext(schemes=["pbkdf2_sha256"], pbkdf2_sha256__rounds=1)
+else:
+    pwd_context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=settings.AUTH_BCRYPT_ROUNDS, deprecated="auto")
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -27,7 +36,19 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     to_encode = data.copy()
     expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    return jwt.encode(to_encode, _SECRET_KEY_BYTES, algorithm=ALGORITHM)
+
+def decode_access_token(token: str) -> dict:
+    """
+    Verifica la firma y expiración de un JWT y retorna su payload.
+    
+    Args:
+        token: JWT firmado con create_access_token
+    
+    Returns:
+        Payload del token (lanza PyJWTError si no es válido)
+    """
+    return jwt.decode(token, _SECRET_KEY_BYTES, algorithms=_ALGORITHMS)
 
 def get_current_user_optional(authorization: Optional[str] = Header(None)) -> Optional[dict]:
     if authorization is None:
@@ -36,7 +57,7 @@ def get_current_user_optional(authorization: Optional[str] = Header(None)) -> Op
         scheme, token = authorization.split()
         if scheme.lower() != "bearer":
             return None
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_access_token(token)
         username = payload.get("sub")
         if not username:
             return None
@@ -53,7 +74,7 @@ def get_current_user(authorization: str = Header(..., alias="Authorization")) ->
         scheme, token = authorization.split()
         if scheme.lower() != "bearer":
             raise HTTPException(status_code=401, detail="Invalid authentication scheme")
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_access_token(token)
         username = payload.get("sub")
         if not username:
             raise HTTPException(status_code=401, detail="Invalid token payload")
@@ -96,7 +117,7 @@ def get_current_admin_user(
     
     # Validar el token
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_access_token(token)
         username = payload.get("sub")
         if not username:
             raise HTTPException(status_code=401, detail="Token inválido")
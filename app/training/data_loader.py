@@ -3,17 +3,86 @@ Data Loader - Gestión de archivos de entrenamiento.
 """
 
 import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import List, Dict, Tuple
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.json as pajson
 import fitz  # PyMuPDF
 import docx
-from openpyxl import load_workbook
+from python_calamine import CalamineWorkbook
 
 logger = logging.getLogger(__name__)
 
 SUPPORTED_EXTENSIONS = {".txt", ".pdf", ".csv", ".json", ".xlsx", ".xls", ".docx"}
 
+# Tamaño de bloque para los lectores de Arrow (8 MB)
+ARROW_BLOCK_SIZE = 8 << 20
+
+
+def deduplicate_lines(lines: List[str]) -> List[str]:
+    """
+    Elimina líneas repetidas conservando el orden de primera aparición.
+    
+    Args:
+        lines: Líneas de entrenamiento
+        
+    Returns:
+        Lista de líneas únicas
+    """
+    unique_lines = list(dict.fromkeys(lines))
+    removed = len(lines) - len(unique_lines)
+    if removed:
+        logger.info(f"Dedup removed {removed} duplicate lines")
+    return unique_lines
+
+
+def _column_to_string(column: pa.Array) -> pa.Array:
+    """
+    Convierte una columna Arrow a texto.
+    
+    Los tipos primitivos se castean con el kernel de Arrow; los anidados
+    (struct, list, map) no admiten cast a string y se representan igual
+    que con pandas astype(str), conservando los nulos.
+    
+    Args:
+        column: Columna de un record batch
+        
+    Returns:
+        Columna de tipo string
+    """
+    if pa.types.is_nested(column.type):
+        return pa.array(
+            [None if value is None else str(value) for value in column.to_pylist()],
+            type=pa.string()
+        )
+    return pc.cast(column, pa.string())
+
+
+def _table_to_lines(table: pa.Table) -> List[str]:
+    """
+    Une las columnas de cada fila en una línea de texto usando kernels de Arrow.
+    
+    Args:
+        table: Tabla Arrow leída del archivo
+        
+    Returns:
+        Lista de líneas (una por fila)
+    """
+    lines = []
+    for batch in table.to_batches():
+        if batch.num_columns == 0:
+            continue
+        columns = [_column_to_string(column) for column in batch.columns]
+        joined = pc.binary_join_element_wise(*columns, " ", null_handling="skip")
+        lines.extend(joined.to_pylist())
+    return lines
+
 
 class TrainingDataLoader:
     """Carga y gestiona archivos de entrenamiento."""
@@ -43,26 +112,37 @@ class TrainingDataLoader:
                 return file_path.read_text(encoding="utf-8").splitlines()
             
             elif ext == ".pdf":
-                text = ""
+                lines = []
                 with fitz.open(str(file_path)) as doc:
                     for page in doc:
-                        text += page.get_text()
-                return text.splitlines()
+                        lines.extend(page.get_text("text", flags=fitz.TEXTFLAGS_TEXT).splitlines())
+                return lines
             
             elif ext == ".csv":
-                df = pd.read_csv(file_path)
-                return df.astype(str).apply(lambda row: " ".join(row), axis=1).tolist()
+                table = pacsv.read_csv(
+                    file_path,
+                    read_options=pacsv.ReadOptions(use_threads=True, block_size=ARROW_BLOCK_SIZE)
+                )
+                return _table_to_lines(table)
             
             elif ext == ".json":
-                df = pd.read_json(file_path)
-                return df.astype(str).apply(lambda row: " ".join(row), axis=1).tolist()
+                try:
+                    # JSON por líneas (NDJSON): lector nativo de Arrow
+                    table = pajson.read_json(
+                        file_path,
+                        read_options=pajson.ReadOptions(use_threads=True, block_size=ARROW_BLOCK_SIZE)
+                    )
+                except pa.ArrowInvalid:
+                    # JSON clásico (array u objeto): pandas lo interpreta y Arrow une las filas
+                    table = pa.Table.from_pandas(pd.read_json(file_path), preserve_index=False)
+                return _table_to_lines(table)
             
             elif ext in [".xlsx", ".xls"]:
-                wb = load_workbook(file_path, read_only=True)
-                sheet = wb.active
+                wb = CalamineWorkbook.from_path(str(file_path))
+                rows = wb.get_sheet_by_index(0).to_python()
                 lines = []
-                for row in sheet.iter_rows():
-                    line = " ".join(str(cell.value) for cell in row if cell.value is not None)
+                for row in rows:
+                    line = " ".join(str(value) for value in row if value is not None and value != "")
                     if line:
                         lines.append(line)
                 return lines
@@ -79,12 +159,14 @@ class TrainingDataLoader:
             logger.error(f"Error reading {file_path.name}: {e}")
             return []
     
-    def collect_from_directory(self, directory: Path) -> Tuple[List[str], int, int]:
+    def collect_from_directory(self, directory: Path, parallel: bool = False) -> Tuple[List[str], int, int]:
         """
         Recopila datos de todos los archivos en un directorio.
         
         Args:
             directory: Directorio a analizar
+            parallel: Parsear los archivos en un pool de procesos (uso por CLI/scripts;
+                la API lo llama secuencialmente desde un hilo)
             
         Returns:
             Tupla (textos, file_count, line_count)
@@ -98,28 +180,47 @@ class TrainingDataLoader:
             logger.warning(f"Directory '{directory}' not found.")
             return texts, file_count, line_count
         
-        for file in directory.glob("*"):
-            if file.suffix.lower() in SUPPORTED_EXTENSIONS:
-                lines = self.parse_file(file)
-                if lines:
-                    file_count += 1
-                    line_count += len(lines)
-                    texts.extend(lines)
+        with os.scandir(directory) as entries:
+            files = [
+                Path(entry.path) for entry in entries
+                if entry.is_file() and os.path.splitext(entry.name)[1].lower() in SUPPORTED_EXTENSIONS
+            ]
+        
+        if parallel and len(files) > 1:
+            # El parseo de cada archivo es independiente: repartirlo entre procesos.
+            # "spawn" evita heredar por fork el estado del proceso padre (hilos, conexiones)
+            max_workers = min(len(files), os.cpu_count() or 1)
+            with ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            ) as executor:
+                results = list(executor.map(self.parse_file, files, chunksize=1))
+        else:
+            results = [self.parse_file(f) for f in files]
+        
+        for lines in results:
+            if lines:
+                file_count += 1
+                line_count += len(lines)
+                texts.extend(lines)
         
         logger.info(f"Valid files: {file_count}, lines extracted: {line_count}")
         return texts, file_count, line_count
     
-    def collect_all_data(self) -> Tuple[List[str], Dict[str, int]]:
+    def collect_all_data(self, parallel: bool = False) -> Tuple[List[str], Dict[str, int]]:
         """
         Recopila todos los datos de ambas carpetas.
         
+        Args:
+            parallel: Parsear los archivos en un pool de procesos (ver collect_from_directory)
+        
         Returns:
             Tupla (textos_combinados, estadísticas)
         """
-        dialogue_data, dialogue_files, dialogue_lines = self.collect_from_directory(self.dialogue_dir)
-        knowledge_data, knowledge_files, knowledge_lines = self.collect_from_directory(self.knowledge_dir)
+        dialogue_data, dialogue_files, dialogue_lines = self.collect_from_directory(self.dialogue_dir, parallel)
+        knowledge_data, knowledge_files, knowledge_lines = self.collect_from_directory(self.knowledge_dir, parallel)
         
-        all_texts = dialogue_data + knowledge_data
+        all_texts = deduplicate_lines(dialogue_data + knowledge_data)
         
         stats = {
             "dialogue_files": dialogue_files,
@@ -2,10 +2,13 @@
 Trainer - Clase principal para entrenamiento de modelos LLM.
 """
 
+import hashlib
 import logging
+import math
+import tempfile
 import time
 from pathlib import Path
-from typing import List, Optional, Callable
+from typing import List, Optional, Callable, Union
 import torch
 from transformers import (
     AutoTokenizer,
@@ -13,24 +16,104 @@ from transformers import (
     Trainer,
     TrainingArguments,
     DataCollatorForLanguageModeling,
+    PreTrainedTokenizerFast,
     TrainerCallback
 )
-from datasets import Dataset
+import pyarrow as pa
+from datasets import Dataset, IterableDataset
 
 logger = logging.getLogger(__name__)
 
+# Líneas por llamada al tokenizer: lotes grandes aprovechan el tokenizer Rust
+TOKENIZE_BATCH_SIZE = 4096
+
+# A partir de este número de líneas el corpus se tokeniza en streaming
+# (IterableDataset); por debajo cabe en memoria y se usa un Dataset con índice
+STREAMING_MIN_LINES = 200_000
+
+# Barajado aproximado del IterableDataset: buffer de ejemplos y semilla
+SHUFFLE_BUFFER_SIZE = 10_000
+SHUFFLE_SEED = 42
+
+# Límite de la caché de corpus tokenizados: al superarlo se borran los archivos
+# usados hace más tiempo. Los temporales huérfanos (job interrumpido) se
+# eliminan pasado TOKEN_CACHE_TMP_MAX_AGE
+TOKEN_CACHE_MAX_BYTES = 2 * 1024 ** 3
+TOKEN_CACHE_TMP_MAX_AGE = 24 * 3600
+
+# bitsandbytes es opcional: permite el optimizador AdamW de 8 bits en CUDA
+try:
+    import bitsandbytes  # noqa: F401
+    BITSANDBYTES_AVAILABLE = True
+except ImportError:
+    BITSANDBYTES_AVAILABLE = False
+
+
+def prune_token_cache(
+    cache_dir: Path,
+    keep: Optional[Path] = None,
+    max_bytes: int = TOKEN_CACHE_MAX_BYTES,
+    tmp_max_age: float = TOKEN_CACHE_TMP_MAX_AGE
+):
+    """
+    Poda la caché de corpus tokenizados.
+    
+    Borra los .arrow usados hace más tiempo hasta que el total quede bajo
+    max_bytes, y los .tmp más antiguos que tmp_max_age (jobs interrumpidos).
+    
+    Args:
+        cache_dir: Directorio de la caché
+        keep: Archivo que nunca se borra (el que se acaba de usar)
+        max_bytes: Tamaño máximo total de los .arrow
+        tmp_max_age: Antigüedad máxima en segundos de los temporales
+    """
+    now = time.time()
+    entries = []
+    for path in cache_dir.iterdir():
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue  # Borrado por otro job
+        if path.suffix == ".tmp":
+            if now - stat.st_mtime > tmp_max_age:
+                path.unlink(missing_ok=True)
+        elif path.suffix == ".arrow":
+            entries.append((stat.st_mtime, stat.st_size, path))
+    
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if keep is not None and path == keep:
+            continue
+        # En POSIX, un job que aún lo tenga mapeado en memoria conserva el acceso
+        path.unlink(missing_ok=True)
+        total -= size
+        logger.info(f"Pruned tokenized cache file: {path.name}")
+
 
 class ProgressCallback(TrainerCallback):
     """Callback para reportar progreso durante el entrenamiento."""
     
-    def __init__(self, progress_callback: Optional[Callable] = None):
+    def __init__(self, progress_callback: Optional[Callable] = None, steps_per_epoch: Optional[int] = None):
+        """
+        Args:
+            progress_callback: Función con firma (epoch, loss, step, total_steps)
+            steps_per_epoch: Pasos por época cuando el dataset no tiene longitud
+                (streaming); el epoch se calcula a partir del paso global
+        """
         self.progress_callback = progress_callback
+        self.steps_per_epoch = steps_per_epoch
     
     def on_log(self, args, state, control, logs=None, **kwargs):
         """Se llama cuando el trainer hace logging."""
         if self.progress_callback and logs:
+            if self.steps_per_epoch:
+                epoch = state.global_step // self.steps_per_epoch
+            else:
+                epoch = int(state.epoch) if state.epoch else 0
             self.progress_callback(
-                epoch=int(state.epoch) if state.epoch else 0,
+                epoch=epoch,
                 loss=logs.get('loss', 0.0),
                 step=state.global_step,
                 total_steps=state.max_steps
@@ -48,7 +131,8 @@ class LLMTrainer:
         model_name: str,
         training_data: List[str],
         output_dir: Path,
-        config: dict = None
+        config: dict = None,
+        cache_dir: Optional[Path] = None
     ):
         """
         Inicializa el entrenador.
@@ -58,11 +142,13 @@ class LLMTrainer:
             training_data: Lista de textos para entrenamiento
             output_dir: Directorio donde guardar el modelo entrenado
             config: Configuración del entrenamiento (epochs, batch_size, etc.)
+            cache_dir: Directorio opcional para cachear el corpus tokenizado
         """
         self.model_name = model_name
         self.training_data = training_data
         self.output_dir = output_dir
         self.config = config or {}
+        self.cache_dir = cache_dir
         
         # Configuración por defecto
         self.num_train_epochs = self.config.get("epochs", 3)
@@ -93,8 +179,14 @@ class LLMTrainer:
         try:
             self.tokenizer = AutoTokenizer.from_pretrained(
                 self.model_name,
-                clean_up_tokenization_spaces=True
+                clean_up_tokenization_spaces=True,
+                use_fast=True
             )
+            if not isinstance(self.tokenizer, PreTrainedTokenizerFast):
+                logger.warning(
+                    f"No fast (Rust) tokenizer available for {self.model_name}; "
+                    "tokenization will be significantly slower"
+                )
             self.model = AutoModelForCausalLM.from_pretrained(self.model_name)
             
             # Asignar pad token si no existe
@@ -107,10 +199,89 @@ class LLMTrainer:
             logger.error(f"Error loading model {self.model_name}: {e}")
             raise
     
-    def prepare_dataset(self) -> Dataset:
+    def get_cache_path(self) -> Optional[Path]:
+        """
+        Calcula la ruta del corpus tokenizado en caché.
+        
+        La clave depende del modelo, de max_length y del contenido de los datos.
+        
+        Returns:
+            Ruta del archivo Arrow, o None si no hay cache_dir
+        """
+        if self.cache_dir is None:
+            return None
+        
+        digest = hashlib.sha256()
+        digest.update(f"{self.model_name}:{self.max_length}".encode("utf-8"))
+        for line in self.training_data:
+            digest.update(b"\n")
+            digest.update(line.encode("utf-8"))
+        
+        return self.cache_dir / f"{digest.hexdigest()[:16]}.arrow"
+    
+    def load_or_build_cached_dataset(self, cache_path: Path) -> Dataset:
+        """
+        Carga el corpus tokenizado desde caché o lo genera una sola vez.
+        
+        El archivo se escribe en formato Arrow IPC por lotes y se abre con
+        memory-mapping, de modo que los reentrenamientos con los mismos datos
+        no vuelven a tokenizar.
+        
+        Args:
+            cache_path: Ruta del archivo Arrow en caché
+            
+        Returns:
+            Dataset tokenizado respaldado por el archivo mapeado en memoria
+        """
+        if cache_path.exists():
+            logger.info(f"Loading tokenized dataset from cache: {cache_path}")
+            # Marca el archivo como usado recientemente (orden de poda)
+            cache_path.touch()
+            return Dataset.from_file(str(cache_path))
+        
+        logger.info(f"Tokenizing dataset into cache: {cache_path}")
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        schema = pa.schema([
+            ("input_ids", pa.list_(pa.int32())),
+            ("attention_mask", pa.list_(pa.int8())),
+        ])
+        # Temporal con nombre único: dos jobs con el mismo corpus no se pisan
+        with tempfile.NamedTemporaryFile(
+            dir=cache_path.parent, prefix=f"{cache_path.stem}.", suffix=".tmp", delete=False
+        ) as tmp:
+            tmp_path = Path(tmp.name)
+        
+        try:
+            with pa.OSFile(str(tmp_path), "wb") as sink, pa.ipc.new_stream(sink, schema) as writer:
+                for start in range(0, len(self.training_data), TOKENIZE_BATCH_SIZE):
+                    encoded = self.tokenizer(
+                        self.training_data[start:start + TOKENIZE_BATCH_SIZE],
+                        truncation=True,
+                        max_length=self.max_length
+                    )
+                    writer.write_batch(pa.record_batch(
+                        [encoded["input_ids"], encoded["attention_mask"]],
+                        schema=schema
+                    ))
+            # Renombrado atómico: un entrenamiento interrumpido no deja una caché corrupta
+            tmp_path.replace(cache_path)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        
+        prune_token_cache(cache_path.parent, keep=cache_path)
+        return Dataset.from_file(str(cache_path))
+    
+    def prepare_dataset(self) -> Union[Dataset, IterableDataset]:
         """
         Prepara el dataset tokenizado.
         
+        Con cache_dir se reutiliza (o se crea) el corpus tokenizado en disco.
+        Sin caché, un corpus pequeño se tokeniza en memoria; uno de
+        STREAMING_MIN_LINES líneas o más se tokeniza en streaming por lotes a
+        medida que el Trainer consume los ejemplos, con barajado por buffer.
+        
         Returns:
             Dataset tokenizado listo para entrenamiento
         """
@@ -119,38 +290,85 @@ class LLMTrainer:
         
         logger.info(f"Preparing dataset with {len(self.training_data)} lines...")
         
+        cache_path = self.get_cache_path()
+        if cache_path is not None:
+            try:
+                dataset = self.load_or_build_cached_dataset(cache_path)
+                logger.info(f"Dataset prepared (cached): {len(dataset)} samples")
+                return dataset
+            except Exception as e:
+                logger.error(f"Error preparing dataset: {e}")
+                raise
+        
         def tokenize_function(example):
-            """Tokeniza y agrega labels."""
-            tokenized = self.tokenizer(
+            """Tokeniza sin padding; el collator rellena cada batch y genera los labels."""
+            return self.tokenizer(
                 example["text"],
-                padding="max_length",
                 truncation=True,
                 max_length=self.max_length
             )
-            # Los labels son una copia de input_ids para language modeling
-            tokenized["labels"] = tokenized["input_ids"].copy()
-            return tokenized
+        
+        if len(self.training_data) < STREAMING_MIN_LINES:
+            try:
+                # El corpus cabe en memoria: Dataset con longitud, el Trainer
+                # baraja cada época y reporta epochs reales
+                raw_dataset = Dataset.from_dict({"text": self.training_data})
+                tokenized_dataset = raw_dataset.map(
+                    tokenize_function,
+                    batched=True,
+                    batch_size=TOKENIZE_BATCH_SIZE,
+                    remove_columns=["text"]
+                )
+                logger.info(f"Dataset prepared: {len(tokenized_dataset)} samples")
+                return tokenized_dataset
+            except Exception as e:
+                logger.error(f"Error preparing dataset: {e}")
+                raise
+        
+        training_data = self.training_data
+        
+        def generate_examples():
+            """Genera los ejemplos de texto uno a uno."""
+            for line in training_data:
+                yield {"text": line}
         
         try:
-            # Crear dataset raw
-            raw_dataset = Dataset.from_dict({"text": self.training_data})
+            # Crear dataset raw en streaming
+            raw_dataset = IterableDataset.from_generator(generate_examples)
             
-            # Tokenizar
+            # Tokenizar de forma perezosa, por lotes
             tokenized_dataset = raw_dataset.map(
                 tokenize_function,
                 batched=True,
+                batch_size=TOKENIZE_BATCH_SIZE,
                 remove_columns=["text"]
             )
             
-            logger.info(f"Dataset prepared: {len(tokenized_dataset)} samples")
+            # Sin sampler aleatorio: barajar con buffer (el Trainer llama a
+            # set_epoch, así que el orden cambia en cada época)
+            tokenized_dataset = tokenized_dataset.shuffle(
+                seed=SHUFFLE_SEED,
+                buffer_size=SHUFFLE_BUFFER_SIZE
+            )
+            
+            logger.info(f"Dataset prepared (streaming): {len(self.training_data)} samples")
             return tokenized_dataset
             
         except Exception as e:
             logger.error(f"Error preparing dataset: {e}")
             raise
     
-    def create_training_arguments(self) -> TrainingArguments:
-        """Crea argumentos de entrenamiento."""
+    def steps_per_epoch(self) -> int:
+        """Pasos de optimización por época (un paso por batch)."""
+        return max(1, math.ceil(len(self.training_data) / self.per_device_train_batch_size))
+    
+    def create_training_arguments(self, streaming: bool = False) -> TrainingArguments:
+        """
+        Crea argumentos de entrenamiento.
+        
+        Args:
+            streaming: El dataset es un IterableDataset (sin longitud)
+        """
         # Crear timestamp para output
         timestamp = time.strftime("%Y%m%d-%H%M%S")
         output_path = self.output_dir / f"{self.model_name.replace('/', '_')}_{timestamp}"
@@ -158,14 +376,42 @@ class LLMTrainer:
         
         logger.info(f"Training output will be saved to: {output_path}")
         
+        # Un IterableDataset no tiene longitud: el Trainer necesita max_steps.
+        # Con un Dataset indexado se deja en -1 y manda num_train_epochs
+        max_steps = self.steps_per_epoch() * self.num_train_epochs if streaming else -1
+        
+        # Precisión mixta: bf16 en GPUs que lo soportan, fp16 en el resto de CUDA
+        use_cuda = torch.cuda.is_available()
+        use_bf16 = use_cuda and torch.cuda.is_bf16_supported()
+        
+        # Optimizador: AdamW 8 bits (bitsandbytes) > AdamW fused (CUDA) > AdamW torch
+        if use_cuda and BITSANDBYTES_AVAILABLE:
+            optim = "adamw_bnb_8bit"
+        elif use_cuda:
+            optim = "adamw_torch_fused"
+        else:
+            optim = "adamw_torch"
+        
         return TrainingArguments(
             output_dir=str(output_path),
             overwrite_output_dir=True,
             num_train_epochs=self.num_train_epochs,
+            max_steps=max_steps,
             per_device_train_batch_size=self.per_device_train_batch_size,
             learning_rate=self.learning_rate,
-            save_steps=500,
-            save_total_limit=2,
+            save_strategy="epoch",
+            save_total_limit=1,
+            save_safetensors=True,
+            bf16=use_bf16,
+            fp16=use_cuda and not use_bf16,
+            tf32=True if use_bf16 else None,  # TF32 requiere Ampere o superior
+            optim=optim,
+            torch_compile=use_bf16,  # Inductor compensa el coste de compilación en Ampere+
+            torch_compile_backend="inductor" if use_bf16 else None,
+            # Recalcular activaciones ahorra VRAM a costa de ~30% más de cómputo;
+            # en CPU no hay memoria de GPU que ahorrar y solo se pierde tiempo
+            gradient_checkpointing=use_cuda,
+            gradient_checkpointing_kwargs={"use_reentrant": False} if use_cuda else None,
             logging_dir=str(output_path / "logs"),
             logging_steps=10,
             evaluation_strategy="no",
@@ -194,12 +440,14 @@ class LLMTrainer:
             tokenized_dataset = self.prepare_dataset()
             
             # Argumentos de entrenamiento
-            training_args = self.create_training_arguments()
+            streaming = isinstance(tokenized_dataset, IterableDataset)
+            training_args = self.create_training_arguments(streaming=streaming)
             
             # Data collator para language modeling
             data_collator = DataCollatorForLanguageModeling(
                 tokenizer=self.tokenizer,
-                mlm=False  # No masked language modeling, solo causal LM
+                mlm=False,  # No masked language modeling, solo causal LM
+                pad_to_multiple_of=8  # Padding dinámico al más largo del batch
             )
             
             # Crear trainer
@@ -208,7 +456,10 @@ class LLMTrainer:
             # Callback para progreso
             callbacks = []
             if self.progress_callback:
-                callbacks.append(ProgressCallback(self.progress_callback))
+                callbacks.append(ProgressCallback(
+                    self.progress_callback,
+                    steps_per_epoch=self.steps_per_epoch() if streaming else None
+                ))
             
             trainer = Trainer(
                 model=self.model,
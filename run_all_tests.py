@@ -2,12 +2,15 @@
 """
 Script para ejecutar todos los tests y generar informe completo.
 """
-import subprocess
 import sys
+import tempfile
+import xml.etree.ElementTree as ET
 from pathlib import Path
 from datetime import datetime
 
-BASE_DIR = Path(__file__).resolve().parent.parent
+import pytest
+
+BASE_DIR = Path(__file__).resolve().parent
 TESTS_DIR = BASE_DIR / "tests"
 
 # Tests a ejecutar (en orden de prioridad)
@@ -19,32 +22,93 @@ TESTS = [
     ("test_m4_integration.py", "Integración M4 (Multi-tenant)"),
 ]
 
-def run_test(test_file: str) -> tuple[bool, str]:
-    """Ejecuta un test y retorna (éxito, output)."""
-    test_path = TESTS_DIR / test_file
-    if not test_path.exists():
-        return False, f"Test no encontrado: {test_file} (buscado en {test_path})"
-    
-    try:
-        # Usar PYTHONPATH para que los imports funcionen
-        env = subprocess.os.environ.copy()
-        env['PYTHONPATH'] = str(BASE_DIR)
-        
-        result = subprocess.run(
-            [sys.executable, str(test_path)],
-            capture_output=True,
-            text=True,
-            timeout=60,
-            cwd=str(BASE_DIR),
-            env=env
+
+def run_tests(test_files: list[str]) -> dict[str, list[tuple[str, str, str]]]:
+    """
+    Ejecuta todos los tests en un único intérprete con pytest.main.
+    
+    Los imports pesados (torch, transformers, fastapi) se pagan una sola vez
+    por proceso y los archivos se reparten entre workers de pytest-xdist
+    (-n auto --dist loadfile: cada archivo corre entero en un mismo worker, así
+    los fixtures de módulo y la base de datos del worker no se parten entre
+    procesos). El resultado de cada caso se lee del informe junitxml de pytest.
+    
+    Returns:
+        Diccionario {archivo: [(caso, estado, detalle), ...]}
+    """
+    cases: dict[str, list[tuple[str, str, str]]] = {test_file: [] for test_file in test_files}
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        junit_path = Path(tmp_dir) / "report.xml"
+        pytest.main(
+            ["-q", "--tb=short", "-n", "auto", "--dist", "loadfile", f"--junitxml={junit_path}"]
+            + [str(TESTS_DIR / test_file) for test_file in test_files]
         )
-        success = result.returncode == 0
-        output = result.stdout + result.stderr
-        return success, output
-    except subprocess.TimeoutExpired:
-        return False, "TIMEOUT: Test excedió 60 segundos"
-    except Exception as e:
-        return False, f"ERROR: {str(e)}"
+        if not junit_path.exists():
+            return cases
+        root = ET.parse(junit_path).getroot()
+    
+    modules = {Path(test_file).stem: test_file for test_file in test_files}
+    for testcase in root.iter("testcase"):
+        classname = testcase.get("classname", "")
+        test_file = next(
+            (modules[part] for part in classname.split(".") if part in modules),
+            None
+        )
+        if test_file is None:
+            continue
+        
+        status, detail = "PASSED", ""
+        for tag, label in (("failure", "FAILED"), ("error", "ERROR"), ("skipped", "SKIPPED")):
+            element = testcase.find(tag)
+            if element is not None:
+                status = label
+                detail = element.get("message", "") + "\n" + (element.text or "")
+                break
+        cases[test_file].append((f"{classname}::{testcase.get('name')}", status, detail.strip()))
+    
+    return cases
+
+
+def summarize_cases(test_file: str, cases: list[tuple[str, str, str]]) -> tuple[bool, str]:
+    """Resume los casos de un archivo y retorna (éxito, output)."""
+    if not (TESTS_DIR / test_file).exists():
+        return False, f"Test no encontrado: {test_file} (buscado en {TESTS_DIR / test_file})"
+    if not cases:
+        return False, "ERROR: pytest no recolectó ningún caso"
+    
+    lines = []
+    for name, status, detail in cases:
+        lines.append(f"{status} {name}")
+        if detail:
+            lines.extend(f"    {line}" for line in detail.split('\n'))
+    
+    # Un caso omitido no se ejecutó (p. ej. async sin marcar): no cuenta como éxito
+    success = all(status == "PASSED" for _, status, _ in cases)
+    return success, "\n".join(lines)
+
+
+def print_test_result(test_file: str, description: str, success: bool, output: str):
+    """Muestra el resultado de un test con las últimas líneas de su output."""
+    print(f"\n{'=' * 80}")
+    print(f" TEST: {description}")
+    print(f" Archivo: {test_file}")
+    print("=" * 80)
+    
+    if success:
+        print("✅ PASSED")
+        # Mostrar últimas 20 líneas si pasó
+        lines = output.split('\n')
+        for line in lines[-20:]:
+            if line.strip():
+                print(f"   {line}")
+    else:
+        print("❌ FAILED")
+        # Mostrar últimas 50 líneas si falló
+        lines = output.split('\n')
+        for line in lines[-50:]:
+            if line.strip():
+                print(f"   {line}")
 
 
 def main():
@@ -55,31 +119,14 @@ def main():
     print("=" * 80)
     print()
     
-    results = []
+    # Una sola sesión de pytest para todos los archivos
+    cases_by_file = run_tests([test_file for test_file, _ in TESTS])
     
+    results = []
     for test_file, description in TESTS:
-        print(f"\n{'=' * 80}")
-        print(f" TEST: {description}")
-        print(f" Archivo: {test_file}")
-        print("=" * 80)
-        
-        success, output = run_test(test_file)
+        success, output = summarize_cases(test_file, cases_by_file[test_file])
         results.append((test_file, description, success, output))
-        
-        if success:
-            print("✅ PASSED")
-            # Mostrar últimas 20 líneas si pasó
-            lines = output.split('\n')
-            for line in lines[-20:]:
-                if line.strip():
-                    print(f"   {line}")
-        else:
-            print("❌ FAILED")
-            # Mostrar últimas 50 líneas si falló
-            lines = output.split('\n')
-            for line in lines[-50:]:
-                if line.strip():
-                    print(f"   {line}")
+        print_test_result(test_file, description, success, output)
     
     # Resumen final
     print("\n" + "=" * 80)
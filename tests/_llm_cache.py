@@ -0,0 +1,93 @@
+"""
+Caché semántica de respuestas LLM para los tests de integración.
+
+Envuelve un provider y reutiliza la respuesta de un prompt casi idéntico
+(similitud coseno >= umbral) en lugar de volver a llamar al LLM.
+La caché vive solo en memoria durante la sesión de pytest y está separada
+por provider y modelo: cambiar de modelo nunca reutiliza respuestas previas.
+"""
+import hashlib
+import logging
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Dimensión del vector de trigramas (hashing trick)
+NGRAM_DIM = 4096
+
+# (clase del provider, model_name) -> (embeddings, respuestas)
+_SESSION_CACHE: Dict[Tuple[str, Optional[str]], Tuple[List[np.ndarray], List[str]]] = {}
+
+
+def prompt_to_text(prompt: Union[str, List[Dict[str, str]]]) -> str:
+    """Aplana un prompt (string o lista de mensajes) a un único texto."""
+    if isinstance(prompt, str):
+        return prompt
+    return "\n".join(f"{m.get('role', '')}: {m.get('content', '')}" for m in prompt)
+
+
+def embed_text(text: str) -> np.ndarray:
+    """
+    Vector normalizado de trigramas de caracteres del texto.
+    
+    Basta para reconocer prompts casi idénticos y no requiere cargar un
+    modelo de embeddings.
+    
+    Args:
+        text: Texto a vectorizar
+    
+    Returns:
+        Vector float32 de NGRAM_DIM con norma 1 (o ceros si el texto es vacío)
+    """
+    vector = np.zeros(NGRAM_DIM, dtype="float32")
+    text = f"  {text.lower()} "
+    for i in range(len(text) - 2):
+        digest = hashlib.blake2b(text[i:i + 3].encode(), digest_size=4).digest()
+        vector[int.from_bytes(digest, "little") % NGRAM_DIM] += 1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class CachingProvider:
+    """Provider que consulta una caché semántica antes de llamar al LLM real."""
+    
+    def __init__(self, provider, threshold: float = 0.95):
+        """
+        Args:
+            provider: Provider real (con método async generate)
+            threshold: Similitud coseno mínima para considerar un acierto
+        """
+        self.provider = provider
+        self.threshold = threshold
+        key = (type(provider).__name__, getattr(provider, "model_name", None))
+        self.embeddings, self.responses = _SESSION_CACHE.setdefault(key, ([], []))
+    
+    def lookup(self, embedding: np.ndarray):
+        """Retorna la respuesta cacheada más similar o None si no supera el umbral."""
+        if not self.embeddings:
+            return None
+        similarities = np.stack(self.embeddings) @ embedding
+        best = int(np.argmax(similarities))
+        if similarities[best] >= self.threshold:
+            return self.responses[best]
+        return None
+    
+    async def generate(self, prompt, **kwargs) -> str:
+        """Genera con caché: solo llama al provider real si no hay acierto."""
+        embedding = embed_text(prompt_to_text(prompt))
+        
+        cached = self.lookup(embedding)
+        if cached is not None:
+            logger.info("[LLMSemCache] Hit")
+            return cached
+        
+        response = await self.provider.generate(prompt, **kwargs)
+        
+        # No cachear errores del provider
+        if response and "[ERROR]" not in response:
+            self.embeddings.append(embedding)
+            self.responses.append(response)
+        
+        return response
@@ -1,23 +1,179 @@
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+# Caché fija de pesos de sentence-transformers (evita re-descargas entre ejecuciones)
+os.environ.setdefault(
+    "SENTENCE_TRANSFORMERS_HOME",
+    str(Path(__file__).resolve().parent.parent / ".cache" / "st")
+)
+
+# Bases SQLite de test en RAM (tmpfs /dev/shm si existe) y vacías al iniciar la
+# sesión. Con pytest-xdist (pytest -n auto --dist=loadfile) cada worker usa su
+# propio directorio para no competir por el mismo archivo.
+if "APP_DATA_DIR" not in os.environ:
+    _ram_dir = Path("/dev/shm") if Path("/dev/shm").is_dir() else Path(tempfile.gettempdir())
+    _data_dir = _ram_dir / f"simpleia_test_{os.getenv('PYTEST_XDIST_WORKER', 'main')}"
+    shutil.rmtree(_data_dir, ignore_errors=True)
+    os.environ["APP_DATA_DIR"] = str(_data_dir)
+
+# Hash de contraseñas barato en tests (ver app/security/auth.py); si se
+# ejecutan con TESTING=0 para probar bcrypt real, con el coste mínimo
+os.environ.setdefault("TESTING", "1")
+os.environ.setdefault("AUTH_BCRYPT_ROUNDS", "4")
+
+# Una conexión SQLite reutilizada por hilo y archivo (ver app/db/pool.py)
+os.environ.setdefault("SQLITE_POOL", "1")
+
 import pytest
+import torch
 from fastapi.testclient import TestClient
 from app.main import app
 from app.models import model_manager
-from app.db.sqlite import USER_DB_PATH, FEEDBACK_DB_PATH
-import os
+from app.db import pool, products, personal, conversations
+from app.db.sqlite import USER_DB_PATH, FEEDBACK_DB_PATH, create_user, get_user, init_user_db
+from app.security.auth import create_access_token, hash_password
 
-# Patch model loading to avoid heavy downloads during tests
+# Contraseña común de los usuarios creados por fixtures, hasheada una sola vez
+HASHED_TEST_PWD = hash_password("test123")
+
+# Los tests solo hacen inferencia: sin autograd y con hilos acotados
+torch.set_grad_enabled(False)
+torch.set_num_threads(max(1, (os.cpu_count() or 2) // 2))
+
+# Patch model loading to avoid heavy downloads during tests (el cargador real
+# queda disponible para los tests de integración vía llm_loaded)
+_real_load_model = model_manager.load_model
 model_manager.load_model = lambda force=False: "dummy-model"
-model_manager.generate = lambda prompt, max_length=50, num_return_sequences=1, temperature=0.7: f"OUTPUT:{prompt}"  # noqa: E501
+
+@pytest.fixture(scope="session")
+def llm_loaded():
+    """Carga el modelo/provider una sola vez por sesión (solo para tests que lo piden)"""
+    _real_load_model(force=True)
+    return model_manager
+
+async def _stub_generate(prompt: str, max_length: int = 50, num_return_sequences: int = 1, temperature: float = 0.7) -> str:
+    """Respuesta fija de model_manager.generate en tests: no toca provider ni modelo"""
+    return f"OUTPUT:{prompt}"
+
+@pytest.fixture(autouse=True)
+def stub_generate(request, monkeypatch):
+    """Sustituye model_manager.generate por el stub, salvo en tests de integración (llm_loaded)"""
+    if "llm_loaded" not in request.fixturenames:
+        monkeypatch.setattr(model_manager, "generate", _stub_generate)
+
+def pytest_sessionfinish(session, exitstatus):
+    # Las conexiones reutilizadas viven toda la sesión; se cierran al final
+    pool.close_all()
 
 @pytest.fixture(scope="session")
 def client():
     # Limpia bases de datos previas para un estado consistente de pruebas
+    # Cerrar conexiones reutilizadas antes de borrar los archivos
+    pool.close_all()
     for path in [USER_DB_PATH, FEEDBACK_DB_PATH]:
-        if path.exists():
-            try:
-                os.remove(path)
-            except OSError:
-                pass
+        path.unlink(missing_ok=True)
     # Usar context manager para asegurar ejecución de eventos startup/lifespan
     with TestClient(app) as c:
         yield c
+
+@pytest.fixture(scope="session")
+def make_auth_headers(client):
+    """
+    Crea el usuario en BD (si falta) y firma su JWT directamente.
+    
+    Evita el round trip a /auth/register y /auth/login en fixtures que no
+    prueban autenticación (test_auth.py mantiene el flujo completo).
+    """
+    def _make(username: str) -> dict:
+        user = get_user(username)
+        if user is None:
+            create_user(username, HASHED_TEST_PWD, role="user")
+            user = get_user(username)
+        token = create_access_token({
+            "sub": user["username"],
+            "is_admin": bool(user.get("is_admin")),
+            "role": user.get("role"),
+            "user_id": user.get("id")
+        })
+        return {"Authorization": f"Bearer {token}"}
+    return _make
+
+@pytest.fixture(scope="session")
+def auth_headers(make_auth_headers):
+    """Headers JWT de un usuario genérico, compartidos por toda la sesión."""
+    return make_auth_headers("sessionuser")
+
+# clave -> (username, role) de los usuarios compartidos por los tests del Módulo 4
+TEST_USERS = {
+    "user1": ("test_user1", "user"),
+    "user2": ("test_user2", "user"),
+    "admin": ("test_admin", "superadmin"),
+    "commercial_test": ("commercial_test", "user"),
+    "personal_test": ("personal_test", "user"),
+    "crud_test": ("crud_test", "user"),
+}
+
+@pytest.fixture(scope="session")
+def m4_databases():
+    """
+    Inicializa los esquemas del Módulo 4 una sola vez por sesión.
+    
+    Los init_*_db() son idempotentes, pero cada llamada repite todos sus
+    CREATE TABLE/INDEX IF NOT EXISTS; los tests dependen de este fixture
+    en lugar de invocarlos.
+    """
+    init_user_db()
+    products.init_products_db()
+    personal.init_personal_db()
+    conversations.init_conversations_db()
+
+@pytest.fixture(scope="session")
+def test_users(m4_databases):
+    """
+    Crea una sola vez por sesión los usuarios de prueba y retorna sus IDs.
+    
+    Returns:
+        Diccionario clave -> ID (claves de TEST_USERS)
+    """
+    ids = {}
+    for key, (username, role) in TEST_USERS.items():
+        user = get_user(username)
+        if user is None:
+            create_user(username, HASHED_TEST_PWD, role == "superadmin", role)
+            user = get_user(username)
+        ids[key] = user["id"]
+    return ids
+
+def _purge_user_data(user_id: int):
+    """Borra físicamente productos, agenda, conversaciones y analytics del usuario."""
+    with pool.connect(products.PRODUCTS_DB_PATH) as conn:
+        conn.execute("DELETE FROM products WHERE user_id = ?", (user_id,))
+    with pool.connect(personal.PERSONAL_DB_PATH) as conn:
+        conn.execute("DELETE FROM appointments WHERE user_id = ?", (user_id,))
+        conn.execute("DELETE FROM tasks WHERE user_id = ?", (user_id,))
+    with pool.connect(conversations.CONVERSATIONS_DB_PATH) as conn:
+        conn.execute(
+            "DELETE FROM messages WHERE conversation_id IN "
+            "(SELECT id FROM conversations WHERE user_id = ?)",
+            (user_id,)
+        )
+        conn.execute("DELETE FROM conversations WHERE user_id = ?", (user_id,))
+        conn.execute("DELETE FROM user_analytics WHERE user_id = ?", (user_id,))
+
+@pytest.fixture
+def isolated_users(test_users):
+    """
+    Usuarios user1, user2 y admin cuyos registros se borran al terminar el test.
+    
+    Las bajas de los CRUD son lógicas y los init_*_db() no truncan, así que sin
+    esta limpieza las tablas crecen con cada test que usa estos usuarios.
+    
+    Returns:
+        Diccionario clave -> ID con las claves user1, user2 y admin
+    """
+    users = {key: test_users[key] for key in ("user1", "user2", "admin")}
+    yield users
+    for user_id in users.values():
+        _purge_user_data(user_id)
@@ -2,12 +2,18 @@
 Pruebas para verificar que los asistentes AI pueden crear datos correctamente.
 """
 import asyncio
+
+import pytest
+
 from app.assistants.commercial import CommercialAssistant
 from app.assistants.personal import PersonalAssistant
 from app.db import products as products_db
 from app.db import personal as personal_db
 
+_PRIORITY_EMOJI = {"high": "🔴", "medium": "🟡", "low": "🟢"}
+
 
+@pytest.mark.asyncio
 async def test_commercial_create_product():
     """Prueba creación de producto mediante lenguaje natural."""
     print("\n=== Prueba: Crear Producto con AI ===")
@@ -29,6 +35,7 @@ async def test_commercial_create_product():
         print(f"🤖 Asistente: {response}")
 
 
+@pytest.mark.asyncio
 async def test_personal_create_task():
     """Prueba creación de tarea mediante lenguaje natural."""
     print("\n\n=== Prueba: Crear Tarea con AI ===")
@@ -49,6 +56,7 @@ async def test_personal_create_task():
         print(f"🤖 Asistente: {response}")
 
 
+@pytest.mark.asyncio
 async def test_personal_create_appointment():
     """Prueba creación de cita mediante lenguaje natural."""
     print("\n\n=== Prueba: Crear Cita con AI ===")
@@ -76,21 +84,21 @@ async def verify_created_data():
     
     # Verificar productos
     print("\n📦 Productos creados:")
-    products = products_db.list_products(user_id)
-    for p in products[-3:]:  # Últimos 3
+    products = products_db.list_products_recent(user_id, limit=3)
+    for p in products:  # Últimos 3
         print(f"  - {p['name']}: ${p['price']} (Stock: {p['stock']})")
     
     # Verificar tareas
     print("\n✅ Tareas creadas:")
-    tasks = personal_db.list_tasks(user_id)
-    for t in tasks[-4:]:  # Últimas 4
-        priority_emoji = {"high": "🔴", "medium": "🟡", "low": "🟢"}.get(t['priority'], "⚪")
+    tasks = personal_db.list_tasks_recent(user_id, limit=4)
+    for t in tasks:  # Últimas 4
+        priority_emoji = _PRIORITY_EMOJI.get(t['priority'], "⚪")
         print(f"  - {priority_emoji} {t['title']} (Vence: {t.get('due_date', 'Sin fecha')})")
     
     # Verificar citas
     print("\n📅 Citas creadas:")
-    appointments = personal_db.list_appointments(user_id)
-    for a in appointments[-3:]:  # Últimas 3
+    appointments = personal_db.list_appointments_recent(user_id, limit=3)
+    for a in appointments:  # Últimas 3
         print(f"  - {a['title']} ({a['start_datetime']})")
 
 
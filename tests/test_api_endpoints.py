@@ -7,6 +7,17 @@ import json
 
 BASE_URL = "http://localhost:8000"
 
+_WHATSAPP_ENDPOINTS = (
+    ("GET", "/api/user/whatsapp/status"),
+    ("GET", "/api/user/whatsapp/settings"),
+    ("GET", "/api/user/whatsapp/logs"),
+)
+
+_REMINDERS_ENDPOINTS = (
+    ("GET", "/api/user/reminders/preferences"),
+    ("GET", "/api/user/reminders/history"),
+)
+
 def test_dashboard_endpoint():
     """Prueba el endpoint del dashboard."""
     print("\n=== Probando /api/user/dashboard ===")
@@ -50,13 +61,7 @@ def test_whatsapp_endpoints():
     """Prueba los endpoints de WhatsApp."""
     print("\n=== Probando endpoints de WhatsApp ===")
     
-    endpoints = [
-        ("GET", "/api/user/whatsapp/status"),
-        ("GET", "/api/user/whatsapp/settings"),
-        ("GET", "/api/user/whatsapp/logs"),
-    ]
-    
-    for method, endpoint in endpoints:
+    for method, endpoint in _WHATSAPP_ENDPOINTS:
         try:
             response = requests.get(f"{BASE_URL}{endpoint}")
             status = "✅" if response.status_code in [200, 401] else "❌"
@@ -69,12 +74,7 @@ def test_reminders_endpoints():
     """Prueba los endpoints de recordatorios."""
     print("\n=== Probando endpoints de Recordatorios ===")
     
-    endpoints = [
-        ("GET", "/api/user/reminders/preferences"),
-        ("GET", "/api/user/reminders/history"),
-    ]
-    
-    for method, endpoint in endpoints:
+    for method, endpoint in _REMINDERS_ENDPOINTS:
         try:
             response = requests.get(f"{BASE_URL}{endpoint}")
             status = "✅" if response.status_code in [200, 401] else "❌"
@@ -1,6 +1,5 @@
 """Tests para cache LRU de respuestas LLM"""
 import pytest
-import time
 from app.core.cache import LLMCache
 
 
@@ -85,31 +84,70 @@ class TestLLMCache:
     
     def test_cache_ttl_expiration(self):
         """Validar expiración por TTL"""
-        cache = LLMCache(max_size=3, default_ttl=1)  # 1 segundo TTL
+        clock = [0.0]
+        cache = LLMCache(max_size=3, ttl_seconds=1, time_fn=lambda: clock[0])  # 1 segundo TTL
         
-        cache.set("prompt", {}, "response")
+        cache.set("prompt", "response")
         
         # Inmediatamente debe estar disponible
-        assert cache.get("prompt", {}) == "response"
+        assert cache.get("prompt") == "response"
         
-        # Esperar expiración
-        time.sleep(1.1)
+        # Avanzar el reloj más allá del TTL
+        clock[0] += 1.1
         
-        # Debe estar expirado
-        assert cache.get("prompt", {}) is None
+        # Debe estar expirado (y eliminado del cache)
+        assert cache.get("prompt") is None
+        assert cache.stats()["size"] == 0
     
-    def test_cache_custom_ttl(self):
-        """Validar TTL custom por entrada"""
-        cache = LLMCache(max_size=3, default_ttl=60)
+    def test_cache_ttl_refreshed_on_set(self):
+        """Validar que volver a guardar una entrada reinicia su TTL"""
+        clock = [0.0]
+        cache = LLMCache(max_size=3, ttl_seconds=1, time_fn=lambda: clock[0])
         
-        # TTL custom de 1 segundo
-        cache.set("prompt1", {}, "response1", ttl=1)
-        cache.set("prompt2", {}, "response2", ttl=60)
+        cache.set("prompt1", "response1")
+        cache.set("prompt2", "response2")
         
-        time.sleep(1.1)
+        clock[0] += 0.8
+        cache.set("prompt1", "response1b")
         
-        assert cache.get("prompt1", {}) is None
-        assert cache.get("prompt2", {}) == "response2"
+        # prompt2 expira a t=1.0; prompt1 (guardado de nuevo a t=0.8) sigue vigente
+        clock[0] += 0.7
+        assert cache.get("prompt1") == "response1b"
+        assert cache.get("prompt2") is None
+        
+        clock[0] += 0.4
+        assert cache.get("prompt1") is None
+    
+    def test_cache_model_name_in_key(self):
+        """Validar que cambiar de modelo produce un miss"""
+        cache = LLMCache(max_size=3, ttl_seconds=60)
+        
+        cache.set("prompt", "response-a", model_name="model-a")
+        
+        assert cache.get("prompt", model_name="model-a") == "response-a"
+        assert cache.get("prompt", model_name="model-b") is None
+        assert cache.get("prompt") is None
+    
+    def test_cache_lru_order_survives_eviction(self):
+        """Validar que el orden de acceso se conserva tras varias expulsiones"""
+        cache = LLMCache(max_size=3, ttl_seconds=60)
+        
+        cache.set("prompt1", "response1")
+        cache.set("prompt2", "response2")
+        cache.set("prompt3", "response3")
+        
+        # prompt1 pasa a ser el más reciente: orden 2, 3, 1
+        assert cache.get("prompt1") == "response1"
+        
+        cache.set("prompt4", "response4")  # expulsa prompt2
+        cache.set("prompt5", "response5")  # expulsa prompt3
+        
+        assert cache.get("prompt2") is None
+        assert cache.get("prompt3") is None
+        assert cache.get("prompt1") == "response1"
+        assert cache.get("prompt4") == "response4"
+        assert cache.get("prompt5") == "response5"
+        assert cache.stats()["size"] == 3
     
     def test_cache_clear(self):
         """Validar limpieza completa del cache"""
@@ -0,0 +1,59 @@
+"""Tests para la lectura de archivos de entrenamiento (CSV/JSON con Arrow)"""
+import json
+
+import pytest
+from app.training.data_loader import TrainingDataLoader
+
+
+@pytest.fixture
+def loader(tmp_path):
+    """Data loader con directorios de entrenamiento en un directorio temporal"""
+    return TrainingDataLoader(tmp_path)
+
+
+class TestParseStructuredFiles:
+    """Tests para CSV/JSON leídos con PyArrow"""
+    
+    def test_csv_primitive_columns(self, loader, tmp_path):
+        """Validar que las columnas primitivas se unen en una línea por fila"""
+        path = tmp_path / "datos.csv"
+        path.write_text(
+            "pregunta,respuesta,puntos\nHola,Buenos días,3\nAdiós,Hasta luego,5\n",
+            encoding="utf-8"
+        )
+        
+        lines = loader.parse_file(path)
+        
+        assert lines == ["Hola Buenos días 3", "Adiós Hasta luego 5"]
+    
+    def test_ndjson_nested_record(self, loader, tmp_path):
+        """Validar que un registro con objeto y lista anidados no descarta el archivo"""
+        path = tmp_path / "datos.json"
+        records = [
+            {"pregunta": "Hola", "meta": {"tags": ["saludo", "inicio"], "nivel": 1}},
+            {"pregunta": "Adiós", "meta": {"tags": ["despedida"], "nivel": 2}},
+        ]
+        path.write_text("\n".join(json.dumps(record) for record in records) + "\n", encoding="utf-8")
+        
+        lines = loader.parse_file(path)
+        
+        assert len(lines) == 2
+        assert lines[0].startswith("Hola ")
+        assert "'tags': ['saludo', 'inicio']" in lines[0]
+        assert lines[1].startswith("Adiós ")
+        assert "'nivel': 2" in lines[1]
+    
+    def test_json_array_with_list_column(self, loader, tmp_path):
+        """Validar JSON clásico (array) con una columna de listas"""
+        path = tmp_path / "datos.json"
+        path.write_text(json.dumps([
+            {"texto": "Primera", "etiquetas": ["a", "b"]},
+            {"texto": "Segunda", "etiquetas": ["c"]},
+        ]), encoding="utf-8")
+        
+        lines = loader.parse_file(path)
+        
+        assert len(lines) == 2
+        assert lines[0].startswith("Primera ")
+        assert "a" in lines[0] and "b" in lines[0]
+        assert lines[1].startswith("Segunda ")
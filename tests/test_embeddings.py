@@ -1,26 +1,68 @@
 """Tests para embeddings y búsqueda vectorial FAISS"""
+import asyncio
+import hashlib
+import os
+import pickle
+import uuid
+import faiss
+import httpx
 import pytest
+import pytest_asyncio
 import numpy as np
-from fastapi.testclient import TestClient
 from unittest.mock import Mock, patch
 from app.main import app
 from app.models.embeddings import EmbeddingStore
 
 
+@pytest.fixture(scope="session")
+def shared_store():
+    """EmbeddingStore compartido: el modelo se carga una sola vez por sesión"""
+    store = EmbeddingStore()
+    store.load_model()
+    return store
+
+
+# Textos literales reutilizados entre tests: se embeben una sola vez
+CANONICAL_TEXTS = (
+    "The cat is on the mat",
+    "A cat sits on a mat",
+    "Python programming language",
+)
+
+
+@pytest.fixture(scope="session")
+def canon_embed(shared_store):
+    """embed() con caché por texto, precargada con CANONICAL_TEXTS"""
+    cache = dict(zip(CANONICAL_TEXTS, shared_store.embed(list(CANONICAL_TEXTS))))
+    
+    def _embed(texts):
+        missing = [text for text in dict.fromkeys(texts) if text not in cache]
+        if missing:
+            cache.update(zip(missing, shared_store.embed(missing)))
+        return np.stack([cache[text] for text in texts])
+    
+    return _embed
+
+
+@pytest.fixture
+def store(shared_store):
+    """Store limpio (sin documentos ni índice) reutilizando el modelo cargado"""
+    shared_store.clear()
+    return shared_store
+
+
 class TestEmbeddingStore:
     """Tests para funcionalidad embeddings"""
     
-    def test_embedding_store_initialization(self):
+    def test_embedding_store_initialization(self, store):
         """Validar inicialización del store"""
-        store = EmbeddingStore()
         
         assert store.model is not None
         assert store.index is None
         assert store.documents == []
     
-    def test_embed_single_text(self):
+    def test_embed_single_text(self, store):
         """Validar embedding de texto simple"""
-        store = EmbeddingStore()
         
         embedding = store.embed("Test text")
         
@@ -28,9 +70,8 @@ class TestEmbeddingStore:
         assert len(embedding.shape) == 1
         assert embedding.shape[0] == 384  # all-MiniLM-L6-v2 dimension
     
-    def test_embed_batch_texts(self):
+    def test_embed_batch_texts(self, store):
         """Validar embedding de múltiples textos"""
-        store = EmbeddingStore()
         
         texts = ["Text 1", "Text 2", "Text 3"]
         embeddings = store.embed(texts)
@@ -38,20 +79,22 @@ class TestEmbeddingStore:
         assert isinstance(embeddings, np.ndarray)
         assert embeddings.shape == (3, 384)
     
-    def test_add_documents(self):
-        """Validar adición de documentos al índice"""
-        store = EmbeddingStore()
+    @pytest.mark.parametrize("docs, expected_n", [
+        (["Document 1", "Document 2", "Document 3"], 3),
+        # Duplicados son agregados (no se filtran)
+        (["Doc 1", "Doc 2", "Doc 1"], 3),
+    ], ids=["distinct", "duplicates"])
+    def test_add_documents(self, store, docs, expected_n):
+        """Validar adición de documentos al índice (incluidos duplicados)"""
         
-        docs = ["Document 1", "Document 2", "Document 3"]
         store.add_documents(docs)
         
-        assert len(store.documents) == 3
+        assert len(store.documents) == expected_n
         assert store.index is not None
-        assert store.index.ntotal == 3
+        assert store.index.ntotal == expected_n
     
-    def test_search_similar_documents(self):
+    def test_search_similar_documents(self, store):
         """Validar búsqueda de documentos similares"""
-        store = EmbeddingStore()
         
         # Agregar documentos
         docs = [
@@ -62,118 +105,200 @@ class TestEmbeddingStore:
         store.add_documents(docs)
         
         # Buscar similar a Python
-        results = store.search("programming with Python", k=2)
+        results = store.search("programming with Python", top_k=2)
         
         assert len(results) == 2
         assert "Python" in results[0]["document"]
         assert "distance" in results[0]
         assert results[0]["distance"] < results[1]["distance"]
     
-    def test_search_empty_index(self):
+    def test_search_empty_index(self, store):
         """Validar búsqueda en índice vacío"""
-        store = EmbeddingStore()
         
-        results = store.search("test query", k=5)
+        results = store.search("test query", top_k=5)
         
         assert results == []
     
-    def test_save_and_load_index(self, tmp_path):
-        """Validar guardado y carga de índice"""
-        store1 = EmbeddingStore()
+    def test_save_and_load_index_in_memory(self, store):
+        """Validar round-trip del índice serializado en memoria (sin disco)"""
+        if not hasattr(faiss, "serialize_index"):
+            pytest.skip("faiss sin serialize_index")
+        
         docs = ["Doc 1", "Doc 2", "Doc 3"]
-        store1.add_documents(docs)
+        store.add_documents(docs)
         
-        # Guardar
-        index_path = tmp_path / "test_index.faiss"
-        docs_path = tmp_path / "test_docs.pkl"
-        store1.save_index(str(index_path), str(docs_path))
+        # Serializar índice y documentos a bytes
+        index_bytes = faiss.serialize_index(store.index)
+        docs_bytes = pickle.dumps(store.documents)
         
-        # Cargar en nuevo store
-        store2 = EmbeddingStore()
-        store2.load_index(str(index_path), str(docs_path))
+        # Limpiar y restaurar en el mismo store
+        store.clear()
+        store.index = faiss.deserialize_index(index_bytes)
+        store.documents = pickle.loads(docs_bytes)
         
-        assert len(store2.documents) == 3
-        assert store2.index.ntotal == 3
+        assert len(store.documents) == 3
+        assert store.index.ntotal == 3
         
         # Verificar funcionalidad
-        results = store2.search("Doc 1", k=1)
+        results = store.search("Doc 1", top_k=1)
         assert len(results) == 1
     
-    def test_add_duplicate_documents(self):
-        """Validar manejo de documentos duplicados"""
-        store = EmbeddingStore()
-        
-        docs = ["Doc 1", "Doc 2", "Doc 1"]
+    def test_save_and_load_index(self, store, tmp_path, monkeypatch):
+        """Validar guardado y carga de índice"""
+        # El store es compartido en la sesión: redirigir su directorio solo en este test
+        monkeypatch.setattr(store, "index_path", str(tmp_path))
+        docs = ["Doc 1", "Doc 2", "Doc 3"]
         store.add_documents(docs)
         
-        # Duplicados son agregados (no se filtran)
+        # Guardar
+        store.save_index("test_index.faiss")
+        assert (tmp_path / "test_index.faiss").exists()
+        assert (tmp_path / "documents.pkl").exists()
+        
+        # Limpiar y cargar de nuevo en el mismo store
+        store.clear()
+        assert store.load_index("test_index.faiss") is True
+        
         assert len(store.documents) == 3
         assert store.index.ntotal == 3
+        
+        # Verificar funcionalidad
+        results = store.search("Doc 1", top_k=1)
+        assert len(results) == 1
     
-    def test_search_with_k_larger_than_index(self):
+    def test_search_with_k_larger_than_index(self, store):
         """Validar búsqueda con k > número de documentos"""
-        store = EmbeddingStore()
         
         docs = ["Doc 1", "Doc 2"]
         store.add_documents(docs)
         
         # k=5 pero solo hay 2 documentos
-        results = store.search("test", k=5)
+        results = store.search("test", top_k=5)
         
         assert len(results) == 2
 
 
+EMBEDDING_DIM = 384
+
+
+def _fake_vector(text: str) -> np.ndarray:
+    """Vector determinista y normalizado, sembrado con el hash del texto"""
+    seed = int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "little")
+    vector = np.random.default_rng(seed).standard_normal(EMBEDDING_DIM).astype("float32")
+    return vector / np.linalg.norm(vector)
+
+
+def _fake_load_model(self):
+    self.dimension = EMBEDDING_DIM
+
+
+def _fake_embed(self, texts):
+    if isinstance(texts, str):
+        return _fake_vector(texts)
+    return np.stack([_fake_vector(text) for text in texts])
+
+
+SEED_DOCUMENTS = [
+    "Python programming language",
+    "JavaScript web development",
+    "Machine learning algorithms"
+]
+
+# Todos los textos de los tests de /embed/encode, codificados en una sola petición
+ENCODE_TEXTS = ["Test text", "Text 1", "Text 2", "Text 3"]
+
+
 class TestEmbeddingEndpoints:
     """Tests para endpoints de embeddings"""
     
-    @pytest.fixture
-    def client(self):
-        """Cliente test con context manager"""
-        with TestClient(app) as c:
+    @pytest.fixture(autouse=True, scope="class")
+    def fake_embed(self):
+        """Sustituye el modelo por vectores hash: aquí se prueba HTTP, no calidad"""
+        with patch.object(EmbeddingStore, "load_model", _fake_load_model), \
+                patch.object(EmbeddingStore, "embed", _fake_embed):
+            yield
+    
+    @pytest.fixture(scope="class")
+    def auth_headers(self, client, make_auth_headers):
+        """Headers con token JWT válido (firmado sin pasar por /auth/login)"""
+        return make_auth_headers(f"embeduser_{uuid.uuid4().hex[:8]}")
+    
+    @pytest_asyncio.fixture
+    async def async_client(self, client):
+        """Cliente ASGI asíncrono (el lifespan ya lo ejecutó `client`)"""
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
             yield c
     
     @pytest.fixture
-    def auth_headers(self, client):
-        """Headers con token JWT válido"""
-        # Registrar y login
-        client.post("/auth/register", json={
-            "username": "embeduser",
-            "password": "embedpass123"
-        })
-        
-        response = client.post("/auth/login", data={
-            "username": "embeduser",
-            "password": "embedpass123"
-        })
-        
-        token = response.json()["access_token"]
-        return {"Authorization": f"Bearer {token}"}
+    def empty_index(self, client, auth_headers):
+        """Vacía el índice para tests que necesitan partir de cero"""
+        client.delete("/embed/clear", headers=auth_headers)
+    
+    @pytest.fixture(scope="class")
+    def seeded(self, fake_embed, client, auth_headers):
+        """Indexa una sola vez (por clase, con el modelo falso activo) el corpus de search y stats"""
+        client.delete("/embed/clear", headers=auth_headers)
+        response = client.post(
+            "/embed/add",
+            json={"documents": SEED_DOCUMENTS},
+            headers=auth_headers
+        )
+        assert response.status_code == 200, response.text
+        return SEED_DOCUMENTS
     
-    def test_encode_single_text(self, client, auth_headers):
-        """Validar endpoint /embed/encode con texto simple"""
+    @pytest.fixture(scope="class")
+    def encode_all(self, fake_embed, client, auth_headers):
+        """Codifica ENCODE_TEXTS en un único POST; los tests leen por posición"""
         response = client.post(
             "/embed/encode",
-            json={"texts": ["Test text"]},
+            json={"texts": ENCODE_TEXTS},
             headers=auth_headers
         )
+        assert response.status_code == 200, response.text
+        return response.json()["embeddings"]
+    
+    @pytest.mark.asyncio
+    async def test_encode_requests(self, async_client, auth_headers):
+        """Validar protocolo de /embed/encode con uno y cero textos (en paralelo)"""
+        single, empty = await asyncio.gather(
+            async_client.post("/embed/encode", json={"texts": ["Test text"]}, headers=auth_headers),
+            async_client.post("/embed/encode", json={"texts": []}, headers=auth_headers)
+        )
         
-        assert response.status_code == 200
-        data = response.json()
+        # Texto simple
+        assert single.status_code == 200
+        data = single.json()
         assert "embeddings" in data
         assert len(data["embeddings"]) == 1
-        assert len(data["embeddings"][0]) == 384
+        assert len(data["embeddings"][0]) == EMBEDDING_DIM
+        
+        # Validación de textos vacíos
+        assert empty.status_code == 422
     
-    def test_encode_multiple_texts(self, client, auth_headers):
-        """Validar endpoint /embed/encode con múltiples textos"""
+    def test_encode_multiple_texts(self, encode_all):
+        """Validar /embed/encode con múltiples textos (un vector por texto, en orden)"""
+        assert len(encode_all) == len(ENCODE_TEXTS)
+        assert all(len(embedding) == EMBEDDING_DIM for embedding in encode_all)
+        
+        # Cada posición corresponde a su texto (vector determinista de _fake_embed)
+        for text, embedding in zip(ENCODE_TEXTS, encode_all):
+            assert np.allclose(embedding, _fake_vector(text), atol=1e-6)
+        
+        # Textos distintos producen vectores distintos
+        assert len({tuple(np.round(embedding, 6)) for embedding in encode_all}) == len(ENCODE_TEXTS)
+    
+    def test_search_empty_index(self, client, auth_headers, empty_index):
+        """Validar búsqueda sin documentos agregados"""
         response = client.post(
-            "/embed/encode",
-            json={"texts": ["Text 1", "Text 2", "Text 3"]},
+            "/embed/search",
+            json={"query": "test", "k": 5},
             headers=auth_headers
         )
         
         assert response.status_code == 200
         data = response.json()
-        assert len(data["embeddings"]) == 3
+        assert data["results"] == []
     
     def test_add_documents(self, client, auth_headers):
         """Validar endpoint /embed/add"""
@@ -188,20 +313,9 @@ class TestEmbeddingEndpoints:
         assert data["status"] == "success"
         assert data["count"] == 2
     
-    def test_search_documents(self, client, auth_headers):
+    def test_search_documents(self, client, auth_headers, seeded):
         """Validar endpoint /embed/search"""
-        # Primero agregar documentos
-        client.post(
-            "/embed/add",
-            json={"documents": [
-                "Python programming language",
-                "JavaScript web development",
-                "Machine learning algorithms"
-            ]},
-            headers=auth_headers
-        )
-        
-        # Buscar
+        # Buscar sobre el corpus sembrado por el fixture
         response = client.post(
             "/embed/search",
             json={"query": "Python code", "k": 2},
@@ -215,33 +329,31 @@ class TestEmbeddingEndpoints:
         assert "document" in data["results"][0]
         assert "distance" in data["results"][0]
     
-    def test_search_empty_index(self, client, auth_headers):
-        """Validar búsqueda sin documentos agregados"""
+    def test_search_documents_columnar(self, client, auth_headers, seeded):
+        """Validar /embed/search?format=columnar (listas paralelas)"""
         response = client.post(
-            "/embed/search",
-            json={"query": "test", "k": 5},
+            "/embed/search?format=columnar",
+            json={"query": "Python code", "top_k": 2},
             headers=auth_headers
         )
         
         assert response.status_code == 200
         data = response.json()
-        assert data["results"] == []
+        assert len(data["documents"]) == len(data["distances"]) == 2
+        assert set(data["documents"]) <= set(seeded)
+        
+        # Resultados ordenados por distancia creciente
+        distances = np.asarray(data["distances"])
+        assert np.all(np.diff(distances) >= 0)
     
-    def test_stats_endpoint(self, client, auth_headers):
+    def test_stats_endpoint(self, client, auth_headers, seeded):
         """Validar endpoint /embed/stats"""
-        # Agregar algunos documentos
-        client.post(
-            "/embed/add",
-            json={"documents": ["Doc 1", "Doc 2", "Doc 3"]},
-            headers=auth_headers
-        )
-        
         response = client.get("/embed/stats", headers=auth_headers)
         
         assert response.status_code == 200
         data = response.json()
         assert data["total_documents"] == 3
-        assert data["embedding_dimension"] == 384
+        assert data["embedding_dimension"] == EMBEDDING_DIM
     
     def test_embeddings_require_auth(self, client):
         """Validar que endpoints requieren autenticación"""
@@ -252,16 +364,6 @@ class TestEmbeddingEndpoints:
         
         assert response.status_code == 401
     
-    def test_encode_empty_texts(self, client, auth_headers):
-        """Validar validación de textos vacíos"""
-        response = client.post(
-            "/embed/encode",
-            json={"texts": []},
-            headers=auth_headers
-        )
-        
-        assert response.status_code == 422
-    
     def test_add_empty_documents(self, client, auth_headers):
         """Validar validación de documentos vacíos"""
         response = client.post(
@@ -276,35 +378,33 @@ class TestEmbeddingEndpoints:
 class TestEmbeddingSimilarity:
     """Tests para validar calidad de embeddings"""
     
-    def test_similar_texts_close_embeddings(self):
+    def test_similar_texts_close_embeddings(self, canon_embed):
         """Validar que textos similares tienen embeddings cercanos"""
-        store = EmbeddingStore()
         
         text1 = "The cat is on the mat"
         text2 = "A cat sits on a mat"
         text3 = "Python programming language"
         
-        emb1 = store.embed(text1)
-        emb2 = store.embed(text2)
-        emb3 = store.embed(text3)
+        embeddings = canon_embed([text1, text2, text3])
         
-        # Similitud coseno
-        def cosine_similarity(a, b):
-            return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
+        # Opcional: producto interno en FP16 (el orden y el umbral toleran ~1e-3)
+        if os.getenv("EMBED_FP16", "0") == "1":
+            embeddings = embeddings.astype(np.float16)
         
-        sim_12 = cosine_similarity(emb1, emb2)
-        sim_13 = cosine_similarity(emb1, emb3)
+        # Embeddings normalizados: la similitud coseno es el producto interno
+        _, sim_12, sim_13 = (embeddings @ embeddings[0]).astype(np.float32)
         
         # Textos similares deben tener mayor similitud
         assert sim_12 > sim_13
         assert sim_12 > 0.7  # Alta similitud
     
-    def test_embedding_normalization(self):
+    def test_embedding_normalization(self, store):
         """Validar que embeddings están normalizados"""
-        store = EmbeddingStore()
         
-        embedding = store.embed("Test text")
-        norm = np.linalg.norm(embedding)
+        texts = [f"sample {i}" for i in range(16)]
+        embeddings = store.embed(texts)
+        norms = np.linalg.norm(embeddings, axis=1)
         
         # Embeddings de sentence-transformers suelen estar normalizados
-        assert 0.9 < norm < 1.1
+        assert norms.shape == (16,)
+        assert np.all((0.9 < norms) & (norms < 1.1))
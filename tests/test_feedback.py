@@ -1,16 +1,20 @@
-def test_feedback_storage_and_length_limit(client):
-    # Register + login
-    client.post("/auth/register", json={"username": "fbuser", "password": "fbpass"})
-    r_login = client.post("/auth/login", data={"username": "fbuser", "password": "fbpass"})
-    token = r_login.json()["access_token"]
+import pytest
 
+
+@pytest.fixture(scope="module")
+def auth_headers(make_auth_headers):
+    # Token firmado directamente (sin /auth/login) una sola vez por módulo
+    return make_auth_headers("fbuser")
+
+
+def test_feedback_storage_and_length_limit(client, auth_headers):
     # Valid feedback
-    r_ok = client.post("/feedback", json={"text": "Muy bueno"}, headers={"Authorization": f"Bearer {token}"})
+    r_ok = client.post("/feedback", json={"text": "Muy bueno"}, headers=auth_headers)
     assert r_ok.status_code == 200, r_ok.text
 
     # Over limit feedback ( >5000 chars )
     too_long = "a" * 6000
-    r_long = client.post("/feedback", json={"text": too_long}, headers={"Authorization": f"Bearer {token}"})
+    r_long = client.post("/feedback", json={"text": too_long}, headers=auth_headers)
     # Pydantic validation error -> 422
     assert r_long.status_code == 422
 
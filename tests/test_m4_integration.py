@@ -2,6 +2,7 @@
 Tests de integración para el Módulo 4.
 Prueba todo el flujo multi-tenant con asistentes contextuales.
 """
+import functools
 import pytest
 import sys
 from pathlib import Path
@@ -11,45 +12,38 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(BASE_DIR))
 
 from app.db import products, personal, conversations
-from app.db.sqlite import create_user, get_user, init_user_db, list_users_with_roles
-from app.assistants.commercial import CommercialAssistant
-from app.assistants.personal import PersonalAssistant
-from passlib.context import CryptContext
+from app.db.sqlite import list_users_with_roles
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# Esquemas creados una sola vez por sesión (ver conftest.py)
+pytestmark = pytest.mark.usefixtures("m4_databases")
+
+
+def _memoize_read_methods(assistant, *names: str):
+    """
+    Memoiza métodos de solo lectura del asistente durante la vida del fixture.
+    
+    El atributo de instancia sombrea al método, así que las llamadas internas
+    (p. ej. build_system_prompt -> get_context) también usan la versión cacheada.
+    Si un test modifica datos, debe llamar a cache_clear() en cada método.
+    
+    Args:
+        assistant: Instancia del asistente
+        names: Nombres de los métodos a memoizar
+    """
+    for name in names:
+        setattr(assistant, name, functools.lru_cache(maxsize=None)(getattr(assistant, name)))
 
 
 class TestM4MultiTenant:
     """Tests de aislamiento multi-tenant."""
     
     @pytest.fixture(autouse=True)
-    def setup(self):
-        """Setup para cada test."""
-        # Inicializar DBs
-        init_user_db()
-        products.init_products_db()
-        personal.init_personal_db()
-        conversations.init_conversations_db()
-        
-        # Crear usuarios de prueba
-        self.user1_id = self._create_test_user("test_user1", "user")
-        self.user2_id = self._create_test_user("test_user2", "user")
-        self.admin_id = self._create_test_user("test_admin", "superadmin")
-    
-    def _create_test_user(self, username: str, role: str) -> int:
-        """Crea un usuario de prueba y retorna su ID."""
-        # Verificar si ya existe
-        existing = get_user(username)
-        if existing:
-            return existing['id']
-        
-        # Crear nuevo
-        is_admin = (role == "superadmin")
-        hashed_pwd = pwd_context.hash("test123")
-        create_user(username, hashed_pwd, is_admin, role)
-        
-        user = get_user(username)
-        return user['id']
+    def setup(self, isolated_users):
+        """Usuarios compartidos; sus registros se borran al terminar cada test."""
+        self.user1_id = isolated_users["user1"]
+        self.user2_id = isolated_users["user2"]
+        self.admin_id = isolated_users["admin"]
     
     def test_user_isolation_products(self):
         """Verifica que cada usuario solo vea sus propios productos."""
@@ -88,8 +82,6 @@ class TestM4MultiTenant:
         
         # User2 no puede acceder a productos de User1
         assert products.get_product(p1_id, self.user2_id) is None
-        
-        print("✅ Test aislamiento de productos: PASSED")
     
     def test_user_isolation_tasks(self):
         """Verifica que cada usuario solo vea sus propias tareas."""
@@ -117,8 +109,6 @@ class TestM4MultiTenant:
         # Verificar que no puede acceder a tareas de otro usuario
         assert personal.get_task(t2_id, self.user1_id) is None
         assert personal.get_task(t1_id, self.user2_id) is None
-        
-        print("✅ Test aislamiento de tareas: PASSED")
     
     def test_user_isolation_appointments(self):
         """Verifica que cada usuario solo vea sus propias citas."""
@@ -145,8 +135,6 @@ class TestM4MultiTenant:
         
         assert personal.get_appointment(a2_id, self.user1_id) is None
         assert personal.get_appointment(a1_id, self.user2_id) is None
-        
-        print("✅ Test aislamiento de citas: PASSED")
     
     def test_user_isolation_conversations(self):
         """Verifica que cada usuario solo vea sus propias conversaciones."""
@@ -167,64 +155,57 @@ class TestM4MultiTenant:
         
         assert conversations.get_conversation(c2_id, self.user1_id) is None
         assert conversations.get_conversation(c1_id, self.user2_id) is None
-        
-        print("✅ Test aislamiento de conversaciones: PASSED")
 
 
 class TestCommercialAssistant:
     """Tests del asistente comercial."""
     
-    @pytest.fixture(autouse=True)
-    def setup(self):
-        """Setup para cada test."""
-        init_user_db()
-        products.init_products_db()
-        
-        # Crear usuario de prueba
-        user = get_user("commercial_test")
-        if not user:
-            hashed_pwd = pwd_context.hash("test123")
-            create_user("commercial_test", hashed_pwd, False, "user")
-            user = get_user("commercial_test")
+    @pytest.fixture(autouse=True, scope="class")
+    def setup(self, request, test_users):
+        """Crea asistente y productos de prueba una sola vez por clase."""
+        from app.assistants.commercial import CommercialAssistant
         
-        self.user_id = user['id']
-        self.assistant = CommercialAssistant(user_id=self.user_id)
+        request.cls.user_id = test_users["commercial_test"]
+        request.cls.assistant = CommercialAssistant(user_id=request.cls.user_id)
         
         # Crear productos de prueba
         self._create_sample_products()
-    
-    def _create_sample_products(self):
-        """Crea productos de ejemplo."""
-        products.create_product(
-            user_id=self.user_id,
-            name="Laptop HP",
-            description="Laptop HP con 16GB RAM",
-            price=1200.0,
-            sku="LAP-HP-001",
-            category="Computadoras",
-            stock=5
-        )
-        
-        products.create_product(
-            user_id=self.user_id,
-            name="Mouse Logitech",
-            description="Mouse inalámbrico",
-            price=45.0,
-            sku="MOU-LOG-001",
-            category="Accesorios",
-            stock=20
-        )
         
-        products.create_product(
-            user_id=self.user_id,
-            name="Teclado Mecánico",
-            description="Teclado gaming RGB",
-            price=150.0,
-            sku="TEC-MEC-001",
-            category="Accesorios",
-            stock=10
+        # Ningún test de la clase modifica productos
+        _memoize_read_methods(
+            request.cls.assistant,
+            "get_context", "search_relevant_products", "build_system_prompt"
         )
     
+    def _create_sample_products(self):
+        """Crea productos de ejemplo (una sola transacción)."""
+        products.create_products_bulk(self.user_id, [
+            {
+                "name": "Laptop HP",
+                "description": "Laptop HP con 16GB RAM",
+                "price": 1200.0,
+                "sku": "LAP-HP-001",
+                "category": "Computadoras",
+                "stock": 5
+            },
+            {
+                "name": "Mouse Logitech",
+                "description": "Mouse inalámbrico",
+                "price": 45.0,
+                "sku": "MOU-LOG-001",
+                "category": "Accesorios",
+                "stock": 20
+            },
+            {
+                "name": "Teclado Mecánico",
+                "description": "Teclado gaming RGB",
+                "price": 150.0,
+                "sku": "TEC-MEC-001",
+                "category": "Accesorios",
+                "stock": 10
+            }
+        ])
+    
     def test_get_context(self):
         """Verifica que el asistente obtenga el contexto correcto."""
         context = self.assistant.get_context()
@@ -233,8 +214,6 @@ class TestCommercialAssistant:
         assert 'Computadoras' in context['categories']
         assert 'Accesorios' in context['categories']
         assert len(context['products']) == 3
-        
-        print("✅ Test context del asistente comercial: PASSED")
     
     def test_search_products(self):
         """Verifica la búsqueda de productos."""
@@ -246,8 +225,6 @@ class TestCommercialAssistant:
         # Búsqueda por categoría
         results = self.assistant.search_relevant_products("accesorios")
         assert len(results) == 2
-        
-        print("✅ Test búsqueda de productos: PASSED")
     
     def test_build_system_prompt(self):
         """Verifica que el prompt del sistema se construya correctamente."""
@@ -257,61 +234,55 @@ class TestCommercialAssistant:
         assert "3" in prompt  # Debe mencionar 3 productos
         assert "Laptop HP" in prompt
         assert "Mouse Logitech" in prompt
-        
-        print("✅ Test system prompt comercial: PASSED")
 
 
 class TestPersonalAssistant:
     """Tests del asistente personal."""
     
-    @pytest.fixture(autouse=True)
-    def setup(self):
-        """Setup para cada test."""
-        init_user_db()
-        personal.init_personal_db()
+    @pytest.fixture(autouse=True, scope="class")
+    def setup(self, request, test_users):
+        """Crea asistente y agenda de prueba una sola vez por clase."""
+        from app.assistants.personal import PersonalAssistant
         
-        # Crear usuario de prueba
-        user = get_user("personal_test")
-        if not user:
-            hashed_pwd = pwd_context.hash("test123")
-            create_user("personal_test", hashed_pwd, False, "user")
-            user = get_user("personal_test")
-        
-        self.user_id = user['id']
-        self.assistant = PersonalAssistant(user_id=self.user_id)
+        request.cls.user_id = test_users["personal_test"]
+        request.cls.assistant = PersonalAssistant(user_id=request.cls.user_id)
         
         # Crear datos de prueba
         self._create_sample_data()
+        
+        # Ningún test de la clase modifica citas ni tareas
+        _memoize_read_methods(
+            request.cls.assistant,
+            "get_context", "get_pending_tasks_by_priority", "build_system_prompt"
+        )
     
     def _create_sample_data(self):
-        """Crea citas y tareas de ejemplo."""
+        """Crea citas y tareas de ejemplo (una transacción por tabla)."""
         # Citas
-        personal.create_appointment(
-            user_id=self.user_id,
-            title="Reunión con cliente",
-            start_datetime="2025-11-25 10:00:00",
-            location="Oficina principal"
-        )
-        
-        personal.create_appointment(
-            user_id=self.user_id,
-            title="Llamada de seguimiento",
-            start_datetime="2025-11-26 15:00:00"
-        )
+        personal.create_appointments_bulk(self.user_id, [
+            {
+                "title": "Reunión con cliente",
+                "start_datetime": "2025-11-25 10:00:00",
+                "location": "Oficina principal"
+            },
+            {
+                "title": "Llamada de seguimiento",
+                "start_datetime": "2025-11-26 15:00:00"
+            }
+        ])
         
         # Tareas
-        personal.create_task(
-            user_id=self.user_id,
-            title="Preparar presentación",
-            priority="high",
-            due_date="2025-11-23"
-        )
-        
-        personal.create_task(
-            user_id=self.user_id,
-            title="Revisar emails",
-            priority="medium"
-        )
+        personal.create_tasks_bulk(self.user_id, [
+            {
+                "title": "Preparar presentación",
+                "priority": "high",
+                "due_date": "2025-11-23"
+            },
+            {
+                "title": "Revisar emails",
+                "priority": "medium"
+            }
+        ])
     
     def test_get_context(self):
         """Verifica que el asistente obtenga el contexto correcto."""
@@ -321,8 +292,6 @@ class TestPersonalAssistant:
         assert context['tasks_count'] == 2
         assert len(context['upcoming_appointments']) == 2
         assert len(context['pending_tasks']) == 2
-        
-        print("✅ Test context del asistente personal: PASSED")
     
     def test_get_pending_tasks_by_priority(self):
         """Verifica la agrupación de tareas por prioridad."""
@@ -331,8 +300,6 @@ class TestPersonalAssistant:
         assert len(grouped['high']) == 1
         assert len(grouped['medium']) == 1
         assert len(grouped['low']) == 0
-        
-        print("✅ Test tareas por prioridad: PASSED")
     
     def test_build_system_prompt(self):
         """Verifica que el prompt del sistema se construya correctamente."""
@@ -342,27 +309,15 @@ class TestPersonalAssistant:
         assert "2" in prompt  # Menciona 2 citas
         assert "Reunión con cliente" in prompt
         assert "Preparar presentación" in prompt
-        
-        print("✅ Test system prompt personal: PASSED")
 
 
 class TestDatabaseOperations:
     """Tests de operaciones CRUD."""
     
-    @pytest.fixture(autouse=True)
-    def setup(self):
-        """Setup para cada test."""
-        init_user_db()
-        products.init_products_db()
-        personal.init_personal_db()
-        
-        user = get_user("crud_test")
-        if not user:
-            hashed_pwd = pwd_context.hash("test123")
-            create_user("crud_test", hashed_pwd, False, "user")
-            user = get_user("crud_test")
-        
-        self.user_id = user['id']
+    @pytest.fixture(autouse=True, scope="class")
+    def setup(self, request, test_users):
+        """Toma el usuario de prueba compartido de la sesión."""
+        request.cls.user_id = test_users["crud_test"]
     
     def test_product_crud(self):
         """Test completo de CRUD de productos."""
@@ -400,8 +355,6 @@ class TestDatabaseOperations:
         
         deleted = products.get_product(product_id, self.user_id)
         assert deleted is None  # No visible porque active=0
-        
-        print("✅ Test CRUD productos: PASSED")
     
     def test_task_crud(self):
         """Test completo de CRUD de tareas."""
@@ -438,8 +391,6 @@ class TestDatabaseOperations:
         
         deleted = personal.get_task(task_id, self.user_id)
         assert deleted is None
-        
-        print("✅ Test CRUD tareas: PASSED")
 
 
 if __name__ == "__main__":
@@ -1,3 +1,6 @@
+from app.core import metrics
+
+
 def test_metrics_endpoint(client):
     # Realiza una petición para generar métricas
     r1 = client.get("/health")
@@ -17,4 +20,33 @@ def test_metrics_endpoint(client):
     # Nuevas métricas por status
     assert "status_counts" in data
     assert 200 in map(int, data["status_counts"].keys()) or 200 in data["status_counts"]
-    assert "path_status_counts" in data
\ No newline at end of file
+    assert "path_status_counts" in data
+
+
+def test_flush_merges_pending_counters():
+    # Ruta exclusiva del test: los totales son globales y compartidos con la sesión
+    path = "/__test_flush"
+    metrics.record_request(path)
+    metrics.record_request(path)
+    metrics.record_latency(path, 10.0)
+    metrics.record_latency(path, 30.0)
+    metrics.record_status(path, 200)
+    metrics.record_status(path, 404)
+    
+    pending = metrics._pending
+    metrics.flush()
+    # flush intercambia los pendientes por unos vacíos
+    assert metrics._pending is not pending
+    assert not metrics._pending.paths
+    
+    data = metrics.snapshot()
+    assert data["path_counts"][path] == 2
+    assert data["avg_latency_ms"][path] == 20.0
+    assert data["path_status_counts"][path] == {200: 1, 404: 1}
+    
+    # Un segundo volcado suma a los totales, no los reemplaza
+    metrics.record_request(path)
+    metrics.record_status(path, 200)
+    data = metrics.snapshot()
+    assert data["path_counts"][path] == 3
+    assert data["path_status_counts"][path] == {200: 2, 404: 1}
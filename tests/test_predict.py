@@ -5,16 +5,12 @@ def test_predict_without_token(client):
     assert data["generated_text"].startswith("OUTPUT:Hola")
 
 
-def test_predict_with_token(client):
-    # Register + login
-    client.post("/auth/register", json={"username": "user2", "password": "pass2"})
-    r_login = client.post("/auth/login", data={"username": "user2", "password": "pass2"})
-    token = r_login.json()["access_token"]
-
+def test_predict_with_token(client, auth_headers):
+    # Token de sesión (el flujo register + login se prueba en test_auth.py)
     r = client.post(
         "/predict",
         json={"prompt": "Probando"},
-        headers={"Authorization": f"Bearer {token}"},
+        headers=auth_headers,
     )
     assert r.status_code == 200
     assert r.json()["generated_text"].startswith("OUTPUT:Probando")
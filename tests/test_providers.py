@@ -1,124 +1,113 @@
 """Tests para provider switching y providers externos"""
+import httpx
 import pytest
-from unittest.mock import Mock, patch, AsyncMock
+import pytest_asyncio
 from app.providers.claude import ClaudeProvider
 from app.providers.openai import OpenAIProvider
 
+# Los providers solo implementan generate(); el streaming aún no existe
+NO_STREAMING_REASON = "ClaudeProvider/OpenAIProvider no implementan generate_stream"
+
+
+@pytest_asyncio.fixture
+async def use_transport():
+    """
+    Sustituye el cliente persistente del provider por uno con transporte simulado.
+    
+    Cierra el cliente real que creó el constructor antes de reemplazarlo, y el
+    simulado al terminar el test.
+    
+    Returns:
+        Función (provider, handler) -> lista donde se registran las peticiones
+        recibidas por el transporte (handler: httpx.Request -> httpx.Response)
+    """
+    providers = []
+    
+    async def _use(provider, handler):
+        seen = []
+        
+        def _handler(request: httpx.Request) -> httpx.Response:
+            seen.append(request)
+            return handler(request)
+        
+        await provider.aclose()
+        provider._client = httpx.AsyncClient(transport=httpx.MockTransport(_handler))
+        providers.append(provider)
+        return seen
+    
+    yield _use
+    for provider in providers:
+        await provider.aclose()
+
 
 class TestClaudeProvider:
     """Tests específicos para ClaudeProvider"""
     
     @pytest.mark.asyncio
-    async def test_claude_generate(self):
+    async def test_claude_generate(self, use_transport):
         """Validar generación con Claude provider"""
         provider = ClaudeProvider(api_key="test-key")
+        seen = await use_transport(provider, lambda request: httpx.Response(
+            200, json={"content": [{"text": "Claude test response"}]}
+        ))
         
-        # Mock httpx AsyncClient
-        mock_response = Mock()
-        mock_response.json.return_value = {
-            "content": [{"text": "Claude test response"}]
-        }
-        mock_response.raise_for_status = Mock()
+        result = await provider.generate("Test prompt")
         
-        with patch('httpx.AsyncClient') as mock_client_cls:
-            mock_client = AsyncMock()
-            mock_client.__aenter__.return_value = mock_client
-            mock_client.post.return_value = mock_response
-            mock_client_cls.return_value = mock_client
-            
-            result = await provider.generate("Test prompt")
-            
-            assert result == "Claude test response"
-            mock_client.post.assert_called_once()
+        assert result == "Claude test response"
+        assert len(seen) == 1
+        assert seen[0].headers["x-api-key"] == "test-key"
     
+    @pytest.mark.xfail(reason=NO_STREAMING_REASON, raises=AttributeError, strict=True)
     @pytest.mark.asyncio
-    async def test_claude_streaming(self):
+    async def test_claude_streaming(self, use_transport):
         """Validar streaming de Claude provider"""
         provider = ClaudeProvider(api_key="test-key")
+        await use_transport(provider, lambda request: httpx.Response(200, content=(
+            b'data: {"type": "content_block_delta", "delta": {"text": "Hello"}}\n'
+            b'data: {"type": "content_block_delta", "delta": {"text": " world"}}\n'
+            b'data: [DONE]\n'
+        )))
         
-        # Mock streaming response
-        async def mock_stream_lines():
-            lines = [
-                b'data: {"type": "content_block_delta", "delta": {"text": "Hello"}}\n',
-                b'data: {"type": "content_block_delta", "delta": {"text": " world"}}\n',
-                b'data: [DONE]\n'
-            ]
-            for line in lines:
-                yield line
+        chunks = []
+        async for chunk in provider.generate_stream("Test"):
+            chunks.append(chunk)
         
-        mock_response = Mock()
-        mock_response.aiter_lines = mock_stream_lines
-        mock_response.raise_for_status = Mock()
-        
-        with patch('httpx.AsyncClient') as mock_client_cls:
-            mock_client = AsyncMock()
-            mock_client.__aenter__.return_value = mock_client
-            mock_client.post.return_value = mock_response
-            mock_client_cls.return_value = mock_client
-            
-            chunks = []
-            async for chunk in provider.generate_stream("Test"):
-                chunks.append(chunk)
-            
-            assert len(chunks) > 0
+        assert len(chunks) > 0
 
 
 class TestOpenAIProvider:
     """Tests específicos para OpenAIProvider"""
     
     @pytest.mark.asyncio
-    async def test_openai_generate(self):
+    async def test_openai_generate(self, use_transport):
         """Validar generación con OpenAI provider"""
         provider = OpenAIProvider(api_key="test-key")
+        seen = await use_transport(provider, lambda request: httpx.Response(
+            200, json={"choices": [{"message": {"content": "OpenAI test response"}}]}
+        ))
         
-        # Mock httpx AsyncClient
-        mock_response = Mock()
-        mock_response.json.return_value = {
-            "choices": [{"message": {"content": "OpenAI test response"}}]
-        }
-        mock_response.raise_for_status = Mock()
+        result = await provider.generate("Test prompt")
         
-        with patch('httpx.AsyncClient') as mock_client_cls:
-            mock_client = AsyncMock()
-            mock_client.__aenter__.return_value = mock_client
-            mock_client.post.return_value = mock_response
-            mock_client_cls.return_value = mock_client
-            
-            result = await provider.generate("Test prompt")
-            
-            assert result == "OpenAI test response"
-            mock_client.post.assert_called_once()
+        assert result == "OpenAI test response"
+        assert len(seen) == 1
+        assert seen[0].headers["authorization"] == "Bearer test-key"
     
+    @pytest.mark.xfail(reason=NO_STREAMING_REASON, raises=AttributeError, strict=True)
     @pytest.mark.asyncio
-    async def test_openai_streaming(self):
+    async def test_openai_streaming(self, use_transport):
         """Validar streaming de OpenAI provider"""
         provider = OpenAIProvider(api_key="test-key")
+        await use_transport(provider, lambda request: httpx.Response(200, content=(
+            b'data: {"choices": [{"delta": {"content": "Hello"}}]}\n'
+            b'data: {"choices": [{"delta": {"content": " world"}}]}\n'
+            b'data: [DONE]\n'
+        )))
         
-        # Mock streaming response
-        async def mock_stream_lines():
-            lines = [
-                b'data: {"choices": [{"delta": {"content": "Hello"}}]}\n',
-                b'data: {"choices": [{"delta": {"content": " world"}}]}\n',
-                b'data: [DONE]\n'
-            ]
-            for line in lines:
-                yield line
-        
-        mock_response = Mock()
-        mock_response.aiter_lines = mock_stream_lines
-        mock_response.raise_for_status = Mock()
+        chunks = []
+        async for chunk in provider.generate_stream("Test"):
+            chunks.append(chunk)
         
-        with patch('httpx.AsyncClient') as mock_client_cls:
-            mock_client = AsyncMock()
-            mock_client.__aenter__.return_value = mock_client
-            mock_client.post.return_value = mock_response
-            mock_client_cls.return_value = mock_client
-            
-            chunks = []
-            async for chunk in provider.generate_stream("Test"):
-                chunks.append(chunk)
-            
-            assert len(chunks) > 0
+        assert len(chunks) > 0
 
 
 class TestProviderInitialization:
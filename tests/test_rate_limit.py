@@ -1,14 +1,40 @@
-def test_rate_limit_predict(client):
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.rate_limit import RateLimiter
+from app.main import app, rate_limiter
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_predict(client, monkeypatch):
+    # Sin recarga durante la ráfaga: el bucket deja pasar exactamente su capacidad
+    monkeypatch.setattr(rate_limiter, "refill_rate", 0.0)
     # Usa un identificador aislado para no heredar consumo previo
     headers = {"X-Rate-Key": "test-limit-1"}
-    successes = 0
-    last_status = None
-    for i in range(12):
-        r = client.post("/predict", json={"prompt": f"Hola {i}"}, headers=headers)
-        last_status = r.status_code
-        if r.status_code == 200:
-            successes += 1
-        else:
-            break
-    assert successes == 10  # exactamente 10 permitidas
-    assert last_status == 429
+    # Ráfaga concurrente (el lifespan ya lo ejecutó `client`)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+        responses = await asyncio.gather(*[
+            ac.post("/predict", json={"prompt": f"Hola {i}"}, headers=headers)
+            for i in range(12)
+        ])
+    statuses = [r.status_code for r in responses]
+    assert statuses.count(200) == 10  # exactamente 10 permitidas
+    assert statuses.count(429) == 2
+
+
+def test_rate_limit_refill():
+    # 1 token de capacidad, recarga de 20 tokens/s (un token cada 50 ms)
+    clock = [0.0]
+    limiter = RateLimiter(requests=1, window_seconds=60, refill_rate=20.0, time_fn=lambda: clock[0])
+    assert limiter.allow("k")
+    assert not limiter.allow("k")
+    # Aún no se recarga un token completo
+    clock[0] += 0.04
+    assert not limiter.allow("k")
+    clock[0] += 0.02
+    assert limiter.allow("k")
+    # Otro identificador tiene su propio bucket
+    assert limiter.allow("otro")